@@ -0,0 +1,162 @@
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from api.versions import bump_version, get_version
+from backend.metrics import registry
+
+CACHE_KEY = 'auth:token:{}'
+VERSION_NAME = 'token_user_{}'
+# Счётчики меняются запросами ``UPDATE`` в обход экземпляра, поэтому
+# в кеше их нет: при обращении они читаются из базы, а полный
+# ``save()`` пользователя из кеша их не перезаписывает.
+DEFERRED_FIELDS = ('recipes_count', 'followers_count')
+
+
+class TokenCache:
+    """Кеш соответствия токена пользователю.
+
+    Первый уровень — LRU-словарь в памяти процесса с временем жизни
+    записей, второй — необязательный кеш Django, общий для воркеров.
+    Каждая запись хранит версию пользователя: при выходе, смене пароля
+    или деактивации версия увеличивается, и запись перестаёт считаться
+    действительной.
+
+    Версии лежат в кеше Django, поэтому до всех воркеров сброс доходит
+    только при общем ``CACHE_BACKEND`` (например, Redis). С
+    ``LocMemCache`` по умолчанию версию увеличивает лишь процесс,
+    обработавший запрос, а остальные принимают старый токен, пока
+    запись не устареет через ``TOKEN_CACHE_TIMEOUT`` секунд.
+    ``TOKEN_CACHE_SHARED`` имеет смысл включать тоже только с общим
+    кешем.
+    """
+
+    def __init__(self, size, timeout, shared):
+        self.size = size
+        self.timeout = timeout
+        self.shared = shared
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _valid(self, entry):
+        expires_at, version, user, token = entry
+        return expires_at > time.monotonic() and version == get_version(
+            VERSION_NAME.format(user.pk)
+        )
+
+    def _remember(self, digest, entry):
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Копии пользователя и токена или ``None``.
+
+        Копии не дают изменениям ``request.user`` в одном запросе
+        попасть в другие запросы.
+        """
+        digest = self.digest(key)
+        result = 'hits'
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+        if entry is None and self.shared:
+            shared = cache.get(CACHE_KEY.format(digest))
+            if shared is not None:
+                # Актуальность записи из общего кеша проверяет версия.
+                entry = (time.monotonic() + self.timeout, *shared)
+                result = 'shared_hits'
+        if entry is None or not self._valid(entry):
+            with self._lock:
+                self.misses += 1
+            return None
+        if result == 'shared_hits':
+            self._remember(digest, entry)
+        with self._lock:
+            setattr(self, result, getattr(self, result) + 1)
+        _, _, user, token = entry
+        user = copy.copy(user)
+        token = copy.copy(token)
+        token.user = user
+        return user, token
+
+    def set(self, key, user, token, version):
+        user = copy.copy(user)
+        for name in DEFERRED_FIELDS:
+            user.__dict__.pop(name, None)
+        token = copy.copy(token)
+        token._state.fields_cache.pop('user', None)
+        digest = self.digest(key)
+        self._remember(
+            digest, (time.monotonic() + self.timeout, version, user, token)
+        )
+        if self.shared:
+            cache.set(
+                CACHE_KEY.format(digest), (version, user, token), self.timeout
+            )
+
+    @staticmethod
+    def forget(user_id):
+        """Делает недействительными закешированные токены пользователя."""
+        bump_version(VERSION_NAME.format(user_id))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+            }
+
+    def samples(self):
+        stats = self.stats()
+        return [
+            (
+                'foodgram_cache_requests_total',
+                (('cache', 'auth_tokens'), ('result', result)),
+                stats[key],
+            )
+            for key, result in (
+                ('hits', 'hit'),
+                ('shared_hits', 'shared_hit'),
+                ('misses', 'miss'),
+            )
+        ]
+
+
+token_cache = TokenCache(
+    settings.TOKEN_CACHE_SIZE,
+    settings.TOKEN_CACHE_TIMEOUT,
+    settings.TOKEN_CACHE_SHARED,
+)
+registry.register_collector(token_cache.samples)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` без запроса к базе для известных токенов."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(
+            key, user, token, get_version(VERSION_NAME.format(user.pk))
+        )
+        return user, token
@@ -0,0 +1,116 @@
+import hashlib
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.versions import get_version
+from backend.db import use_primary
+from backend.metrics import registry
+
+CACHE_KEY = 'response:{}:{}:{}'
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+
+class AnonymousResponseCache:
+    """Кеш ответов API для анонимных пользователей.
+
+    Для анонима флаги избранного, корзины и подписки всегда ложны,
+    поэтому ответ зависит только от пути и параметров запроса. Ключ
+    включает версию набора данных ``name``, которую сигналы
+    увеличивают при изменении данных, так что старые записи просто
+    перестают читаться и вытесняются по тайм-ауту. Промахи читают
+    основную базу.
+    """
+
+    def __init__(self, name, timeout):
+        self.name = name
+        self.timeout = timeout
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, request):
+        query = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        )
+        digest = hashlib.sha256(
+            repr(
+                (
+                    request.get_host(),
+                    request.path,
+                    request.accepted_renderer.format,
+                    query,
+                )
+            ).encode()
+        ).hexdigest()
+        return CACHE_KEY.format(self.name, get_version(self.name), digest)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def samples(self):
+        stats = self.stats()
+        return [
+            (
+                'foodgram_cache_requests_total',
+                (('cache', self.name), ('result', result)),
+                stats[key],
+            )
+            for key, result in (('hits', 'hit'), ('misses', 'miss'))
+        ]
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def response(self, request, handler, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = self.key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            self._count(hit=True)
+            data, headers = entry
+            response = get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    headers.get('Last-Modified')
+                ),
+            )
+            if response is None:
+                response = Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+            return response
+        self._count(hit=False)
+        # Промах бывает сразу после изменения данных: ответ с
+        # отстающей реплики остался бы в кеше до тайм-аута.
+        with use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            headers = {
+                header: response[header]
+                for header in CACHED_HEADERS
+                if response.has_header(header)
+            }
+            cache.set(key, (response.data, headers), self.timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+recipes_cache = AnonymousResponseCache(
+    'recipes', settings.RESPONSE_CACHE_TIMEOUT
+)
+registry.register_collector(recipes_cache.samples)
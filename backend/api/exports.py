@@ -0,0 +1,67 @@
+import csv
+import hashlib
+import json
+
+NAME = 'ingredient__name'
+UNIT = 'ingredient__measurement_unit'
+AMOUNT = 'total_amount'
+
+
+class Echo:
+    """Псевдобуфер, возвращающий записанную строку вместо её хранения."""
+
+    def write(self, value):
+        return value
+
+
+def export_txt(ingredients):
+    yield 'Список покупок:\n'
+    for ingredient in ingredients:
+        yield f'{ingredient[NAME]} - {ingredient[AMOUNT]} {ingredient[UNIT]}\n'
+
+
+def export_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for ingredient in ingredients:
+        yield writer.writerow(
+            (ingredient[NAME], ingredient[AMOUNT], ingredient[UNIT])
+        )
+
+
+def export_json(ingredients):
+    separator = '['
+    for ingredient in ingredients:
+        yield separator + json.dumps(
+            {
+                'name': ingredient[NAME],
+                'amount': ingredient[AMOUNT],
+                'measurement_unit': ingredient[UNIT],
+            },
+            ensure_ascii=False,
+        )
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
+
+EXPORTERS = {
+    'txt': export_txt,
+    'csv': export_csv,
+    'json': export_json,
+}
+
+
+def export_shopping_list(ingredients, export_format):
+    """Построчно выгружает агрегированный список покупок."""
+    return EXPORTERS[export_format](ingredients.iterator())
+
+
+def shopping_list_etag(ingredients, export_format):
+    """ETag по содержимому списка покупок без сборки файла в памяти."""
+    digest = hashlib.sha256(export_format.encode())
+    for ingredient in ingredients.iterator():
+        digest.update(
+            f'{ingredient[NAME]}\0{ingredient[UNIT]}\0'
+            f'{ingredient[AMOUNT]}\n'.encode()
+        )
+    return f'"{digest.hexdigest()[:32]}"'
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import FilterSet, filters
 
+from api.search import search_recipes
 from recipes.models import Ingredient, Recipe, Tag
 
 User = get_user_model()
@@ -22,6 +23,9 @@ class RecipeFilter(FilterSet):
     is_favorited = filters.BooleanFilter(
         method='filter',
     )
+    search = filters.CharFilter(
+        method='filter_search',
+    )
 
     def filter(self, queryset, name, value):
         query_params = {
@@ -32,6 +36,12 @@ class RecipeFilter(FilterSet):
             return queryset.filter(**{query_params[name]: self.request.user})
         return queryset
 
+    @staticmethod
+    def filter_search(queryset, name, value):
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
+
     class Meta:
         model = Recipe
         fields = ('tags',)
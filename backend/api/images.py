@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from api.authentication import token_cache
+from api.versions import bump_version
+
+THUMBNAIL_SIZE = (400, 400)
+WEBP_QUALITY = 80
+VARIANT_SUFFIXES = ('_thumbnail', '_webp')
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS, thread_name_prefix='image-variants'
+)
+
+
+def encode_webp(image):
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=WEBP_QUALITY)
+    return buffer.getvalue()
+
+
+def render_variants(source):
+    """Возвращает байты уменьшенной копии и полноразмерного WebP."""
+    with source.open('rb'), Image.open(source) as image:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        webp = encode_webp(image)
+        image.thumbnail(THUMBNAIL_SIZE)
+        thumbnail = encode_webp(image)
+    return thumbnail, webp
+
+
+def store_variants(model, pk, field_name):
+    """Строит варианты изображения и сохраняет их в модель.
+
+    Если за время обработки изображение успело смениться, результат
+    не записывается: варианты построит задача для нового файла.
+    """
+    instance = model.objects.filter(pk=pk).only(field_name).first()
+    source = getattr(instance, field_name, None)
+    if not source:
+        return
+    thumbnail, webp = render_variants(source)
+    path = PurePosixPath(source.name)
+    names = (
+        source.storage.save(
+            f'{path.parent}/variants/{path.stem}_thumbnail.webp',
+            ContentFile(thumbnail),
+        ),
+        source.storage.save(
+            f'{path.parent}/variants/{path.stem}.webp', ContentFile(webp)
+        ),
+    )
+    updated = model.objects.filter(pk=pk, **{field_name: source.name}).update(
+        **{
+            field_name + suffix: name
+            for suffix, name in zip(VARIANT_SUFFIXES, names)
+        },
+        updated_at=timezone.now(),
+    )
+    if updated:
+        # Варианты изображений входят в ответы с рецептами.
+        bump_version('recipes')
+        if model is get_user_model():
+            token_cache.forget(pk)
+
+
+def build_variants(model, pk, field_name):
+    try:
+        store_variants(model, pk, field_name)
+    finally:
+        connection.close()
+
+
+def clear_variants(instance, field_name):
+    for suffix in VARIANT_SUFFIXES:
+        setattr(instance, field_name + suffix, None)
+
+
+def schedule_variants(instance, field_name):
+    """Ставит построение вариантов в очередь после фиксации транзакции.
+
+    При ``IMAGE_VARIANTS_SYNC`` варианты строятся сразу в текущем
+    потоке, что удобно для локального запуска и тестов.
+    """
+    if not getattr(instance, field_name):
+        return
+    model, pk = type(instance), instance.pk
+    if settings.IMAGE_VARIANTS_SYNC:
+        transaction.on_commit(lambda: store_variants(model, pk, field_name))
+    else:
+        transaction.on_commit(
+            lambda: executor.submit(build_variants, model, pk, field_name)
+        )
@@ -0,0 +1,137 @@
+from bisect import bisect_left
+from threading import Lock
+
+from api.versions import bump_version, get_version
+from backend.db import use_primary
+from recipes.models import Ingredient, Recipe
+
+PREFIX_END = chr(0x10FFFF)
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для поиска по началу названия.
+
+    Названия хранятся отсортированными в нижнем регистре, поэтому все
+    совпадения по префиксу находятся двумя вызовами ``bisect``.
+    Индекс строится лениво и перестраивается, когда меняется версия
+    справочника ингредиентов.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._index = None
+
+    def _get_index(self):
+        version = get_version('ingredients')
+        index = self._index
+        if index is not None and index[0] == version:
+            return index[1:]
+        with self._lock:
+            if self._index is None or self._index[0] != version:
+                with use_primary():
+                    ingredients = list(
+                        Ingredient.objects.values_list(
+                            'id', 'name', 'measurement_unit'
+                        )
+                    )
+                rows = sorted(
+                    (
+                        (name.casefold(), pk, name, measurement_unit)
+                        for pk, name, measurement_unit in ingredients
+                    ),
+                    key=lambda row: (row[0], row[1]),
+                )
+                keys = [row[0] for row in rows]
+                items = [
+                    {
+                        'id': pk,
+                        'name': name,
+                        'measurement_unit': measurement_unit,
+                    }
+                    for _, pk, name, measurement_unit in rows
+                ]
+                self._index = (version, keys, items)
+            return self._index[1:]
+
+    def search(self, query):
+        """Ингредиенты, название которых начинается с ``query``.
+
+        Точное совпадение в отсортированном списке стоит раньше
+        более длинных названий с тем же началом, поэтому все совпадения
+        находятся двумя вызовами ``bisect`` уже в нужном порядке.
+        """
+        query = query.casefold()
+        keys, items = self._get_index()
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + PREFIX_END, start)
+        return items[start:end]
+
+
+class RecipeIdSet:
+    """Множество существующих ID рецептов в виде битовой карты.
+
+    Новые рецепты всегда получают ID больше уже известных, поэтому
+    при запросе ID выше известного максимума догружаются только
+    недостающие ID. Удаление рецепта сбрасывает бит в текущем процессе
+    и увеличивает версию, чтобы остальные процессы перестроили карту.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._state = None
+
+    def _load(self, version):
+        ids = Recipe.objects.order_by('-id').values_list('id', flat=True)
+        with use_primary():
+            max_id = ids.first() or 0
+            bitmap = bytearray(max_id // 8 + 1)
+            for pk in ids.iterator():
+                bitmap[pk >> 3] |= 1 << (pk & 7)
+        return [version, bitmap, max_id]
+
+    def _get_state(self):
+        version = get_version('recipe_ids')
+        state = self._state
+        if state is None or state[0] != version:
+            with self._lock:
+                if self._state is None or self._state[0] != version:
+                    self._state = self._load(version)
+                state = self._state
+        return state
+
+    def _extend(self, state):
+        with use_primary():
+            new_ids = list(
+                Recipe.objects.filter(id__gt=state[2])
+                .order_by('id')
+                .values_list('id', flat=True)
+            )
+        if not new_ids:
+            return
+        with self._lock:
+            bitmap = state[1]
+            bitmap.extend(bytes(new_ids[-1] // 8 + 1 - len(bitmap)))
+            for pk in new_ids:
+                bitmap[pk >> 3] |= 1 << (pk & 7)
+            state[2] = max(state[2], new_ids[-1])
+
+    def __contains__(self, pk):
+        state = self._get_state()
+        if pk > state[2]:
+            self._extend(state)
+            if pk > state[2]:
+                return False
+        return bool(state[1][pk >> 3] & (1 << (pk & 7)))
+
+    def discard(self, pk):
+        if pk is None:
+            return
+        state = self._state
+        if state is not None and pk <= state[2]:
+            with self._lock:
+                state[1][pk >> 3] &= ~(1 << (pk & 7)) & 0xFF
+        bump_version('recipe_ids')
+
+
+ingredient_index = IngredientIndex()
+recipe_ids = RecipeIdSet()
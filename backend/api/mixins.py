@@ -1,36 +1,321 @@
+import hashlib
+
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import status
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
-from api.serializers import ShortRecipeSerializer
+from api.relations import link, unlink
+from api.serializers import BulkIdsSerializer, ShortRecipeSerializer
+from api.utils import parse_id
+from api.viewer import ViewerContext
 
 
-class BaseRecipeAction:
-    def handle_action(
-        self, request, model, pk, err_msg_exist, err_msg_not_found
+class CursorPaginationMixin:
+    """Включает пагинацию по ключу по запросу клиента.
+
+    Используется, если передан ``?pagination=cursor`` или курсор
+    следующей страницы, иначе работает обычная постраничная пагинация.
+    """
+
+    cursor_pagination_class = None
+
+    def use_cursor_pagination(self):
+        query_params = self.request.query_params
+        return (
+            query_params.get('pagination') == 'cursor'
+            or self.cursor_pagination_class.cursor_query_param in query_params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.use_cursor_pagination():
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+
+class ViewerContextMixin:
+    """Передаёт сериализаторам ``ViewerContext`` текущего пользователя.
+
+    ``get_serializer`` заранее загружает отметки для всех
+    сериализуемых объектов. ``viewer_recipe_field`` и
+    ``viewer_author_field`` называют поля объекта с ID рецепта
+    и автора.
+    """
+
+    viewer_recipe_field = None
+    viewer_author_field = None
+
+    @property
+    def viewer_fields(self):
+        return tuple(
+            field
+            for field in (self.viewer_recipe_field, self.viewer_author_field)
+            if field is not None
+        )
+
+    def get_viewer(self):
+        if not hasattr(self, '_viewer'):
+            self._viewer = ViewerContext(self.request.user)
+        return self._viewer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['viewer'] = self.get_viewer()
+        return context
+
+    @staticmethod
+    def viewer_ids(items, field):
+        if field is None:
+            return ()
+        return [
+            item[field] if isinstance(item, dict) else getattr(item, field)
+            for item in items
+        ]
+
+    def preload_viewer(self, items):
+        self.get_viewer().load(
+            recipe_ids=self.viewer_ids(items, self.viewer_recipe_field),
+            author_ids=self.viewer_ids(items, self.viewer_author_field),
+        )
+
+    def get_viewer_state(self, items):
+        if self.request.user.is_anonymous:
+            return None
+        self.preload_viewer(items)
+        viewer = self.get_viewer()
+        recipe_ids = self.viewer_ids(items, self.viewer_recipe_field)
+        author_ids = self.viewer_ids(items, self.viewer_author_field)
+        return (
+            [pk in viewer.favorited for pk in recipe_ids],
+            [pk in viewer.in_shopping_cart for pk in recipe_ids],
+            [pk in viewer.followed for pk in author_ids],
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else None
+        if instance is not None and self.request.user.is_authenticated:
+            self.preload_viewer(instance if kwargs.get('many') else [instance])
+        return super().get_serializer(*args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 на условные GET ещё до сериализации.
+
+    Валидаторы берутся лёгким запросом ``values()`` с теми же
+    фильтрами и пагинацией, что и ответ: ETag считается по
+    идентификаторам, отметкам ``updated_at`` и флагам текущего
+    пользователя из ``get_viewer_state``. ``Last-Modified`` отдаётся
+    только анониму и только для одного объекта: удаление строки из
+    списка или снятие флага не увеличивает максимальную дату
+    изменения.
+    """
+
+    last_modified_fields = ('updated_at',)
+    viewer_fields = ()
+
+    def get_validator_queryset(self, queryset):
+        fields = ('id', *self.last_modified_fields)
+        if self.request.user.is_authenticated:
+            fields += self.viewer_fields
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(fields)
+        )
+
+    def get_viewer_state(self, rows):
+        return None
+
+    def get_last_modified(self, row):
+        return max(row[field] for field in self.last_modified_fields)
+
+    def make_etag(self, *parts):
+        content = repr((self.request.accepted_renderer.format, parts))
+        return '"{}"'.format(hashlib.sha256(content.encode()).hexdigest()[:32])
+
+    def conditional_response(self, handler, etag, last_modified=None):
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler()
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = self.get_validator_queryset(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            rows = page
+            meta = self.get_paginated_response([]).data
+        else:
+            rows = list(rows)
+            meta = None
+
+        def render():
+            objects = queryset.in_bulk([row['id'] for row in rows])
+            serializer = self.get_serializer(
+                [objects[row['id']] for row in rows if row['id'] in objects],
+                many=True,
+            )
+            if page is not None:
+                return self.get_paginated_response(serializer.data)
+            return Response(serializer.data)
+
+        return self.conditional_response(
+            render, self.make_etag(meta, rows, self.get_viewer_state(rows))
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_validator_queryset(
+                self.filter_queryset(self.get_queryset())
+            ),
+            **{self.lookup_field: kwargs[lookup_url_kwarg]},
+        )
+        last_modified = None
+        if request.user.is_anonymous:
+            last_modified = self.get_last_modified(row)
+        return self.conditional_response(
+            lambda: super(ConditionalGetMixin, self).retrieve(
+                request, *args, **kwargs
+            ),
+            self.make_etag(row, self.get_viewer_state([row])),
+            last_modified,
+        )
+
+
+class AnonymousCacheMixin:
+    """Отдаёт анонимам ``list`` и ``retrieve`` из кеша ответов."""
+
+    anonymous_cache = None
+
+    def list(self, request, *args, **kwargs):
+        return self.anonymous_cache.response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.anonymous_cache.response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+
+class BulkActionMixin:
+    """Массовое добавление и удаление связей пользователя.
+
+    Принимает ``{"ids": [...]}``, выполняет одну вставку
+    ``INSERT ... ON CONFLICT DO NOTHING`` или одно удаление и
+    возвращает статус по каждому переданному идентификатору.
+    """
+
+    def bulk_mutate(
+        self,
+        request,
+        model,
+        owner_field,
+        target_field,
+        rejected=(),
     ):
-        user = request.user
-        recipe = self.get_object()
-        instance = model.objects.filter(user=user, recipe=recipe).first()
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        owner = request.user
+        candidates = [pk for pk in ids if pk not in rejected]
 
         if request.method == 'POST':
-            if instance:
-                return Response(
-                    {'detail': err_msg_exist},
-                    status=status.HTTP_400_BAD_REQUEST,
+            changed = link(
+                model, owner_field, owner.id, target_field, candidates
+            )
+            if changed:
+                model.objects.added(owner, changed)
+            done, skipped = 'created', 'exists'
+        else:
+            changed = unlink(
+                model, owner_field, owner.id, target_field, candidates
+            )
+            if changed:
+                model.objects.removed(owner, changed)
+            done, skipped = 'deleted', 'absent'
+
+        found = set(changed)
+        unchanged = [pk for pk in candidates if pk not in changed]
+        if unchanged:
+            targets = model._meta.get_field(target_field).related_model
+            found.update(
+                targets.objects.filter(id__in=unchanged).values_list(
+                    'id', flat=True
                 )
+            )
+        results = []
+        for pk in ids:
+            if pk in rejected:
+                item_status = 'rejected'
+            elif pk not in found:
+                item_status = 'not_found'
+            else:
+                item_status = done if pk in changed else skipped
+            results.append({'id': pk, 'status': item_status})
+        return results, changed
+
+    def bulk_response(self, results):
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
 
-            model.objects.create(user=user, recipe=recipe)
+class BaseRecipeAction(BulkActionMixin):
+    def handle_action(
+        self,
+        request,
+        model,
+        pk,
+        err_msg_exist,
+        err_msg_not_found,
+    ):
+        user = request.user
+
+        if request.method == 'POST':
+            recipe = self.get_object()
+            with transaction.atomic():
+                if not link(model, 'user', user.id, 'recipe', (recipe.id,)):
+                    return Response(
+                        {'detail': err_msg_exist},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                model.objects.added(user, (recipe.id,))
             serializer = ShortRecipeSerializer(recipe)
             return Response(
                 serializer.data,
                 status=status.HTTP_201_CREATED,
             )
 
-        if instance:
-            instance.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        recipe_id = parse_id(pk)
+        recipe_ids = () if recipe_id is None else (recipe_id,)
+        with transaction.atomic():
+            if unlink(model, 'user', user.id, 'recipe', recipe_ids):
+                model.objects.removed(user, recipe_ids)
+                return Response(status=status.HTTP_204_NO_CONTENT)
 
+        self.get_object()
         return Response(
             {'detail': err_msg_not_found},
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+    def handle_bulk_action(self, request, model):
+        with transaction.atomic():
+            results, _ = self.bulk_mutate(request, model, 'user', 'recipe')
+        return self.bulk_response(results)
+
+    def handle_clear(self, request, model):
+        user = request.user
+        with transaction.atomic():
+            recipe_ids = unlink(model, 'user', user.id, 'recipe')
+            if recipe_ids:
+                model.objects.removed(user, recipe_ids)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,6 +1,22 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class CustomCursorPagination(CursorPagination):
+    """Пагинация по ключу без COUNT и OFFSET.
+
+    Следующая страница ищется условием по ``id``, поэтому время ответа
+    не зависит от глубины прокрутки.
+    """
+
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = '-id'
+
+
+class UserCursorPagination(CustomCursorPagination):
+    ordering = 'id'
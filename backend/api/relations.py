@@ -0,0 +1,64 @@
+from django.db import connections, router
+
+
+def _relation_sql(model, owner_field, target_field):
+    opts = model._meta
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    target = opts.get_field(target_field)
+    target_opts = target.related_model._meta
+    return connection, {
+        'table': quote(opts.db_table),
+        'owner': quote(opts.get_field(owner_field).column),
+        'target': quote(target.column),
+        'target_table': quote(target_opts.db_table),
+        'target_pk': quote(target_opts.pk.column),
+    }
+
+
+def _execute(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def link(model, owner_field, owner_id, target_field, target_ids):
+    """Создаёт связи владельца с объектами одним запросом.
+
+    ``INSERT ... SELECT`` берёт только существующие объекты, а
+    ``ON CONFLICT DO NOTHING`` пропускает уже созданные связи, поэтому
+    параллельные запросы не падают на ограничении уникальности.
+    Возвращает множество идентификаторов, для которых связь создана.
+    """
+    target_ids = list(target_ids)
+    if not target_ids:
+        return set()
+    connection, names = _relation_sql(model, owner_field, target_field)
+    placeholders = ', '.join(['%s'] * len(target_ids))
+    sql = (
+        'INSERT INTO {table} ({owner}, {target}) '
+        'SELECT %s, {target_pk} FROM {target_table} '
+        'WHERE {target_pk} IN ({placeholders}) '
+        'ON CONFLICT DO NOTHING RETURNING {target}'
+    ).format(placeholders=placeholders, **names)
+    return _execute(connection, sql, [owner_id, *target_ids])
+
+
+def unlink(model, owner_field, owner_id, target_field, target_ids=None):
+    """Удаляет связи владельца с объектами одним запросом.
+
+    Без ``target_ids`` удаляются все связи владельца. Возвращает
+    множество идентификаторов, связи с которыми были удалены.
+    """
+    connection, names = _relation_sql(model, owner_field, target_field)
+    sql = 'DELETE FROM {table} WHERE {owner} = %s'
+    params = [owner_id]
+    if target_ids is not None:
+        target_ids = list(target_ids)
+        if not target_ids:
+            return set()
+        placeholders = ', '.join(['%s'] * len(target_ids))
+        sql += f' AND {{target}} IN ({placeholders})'
+        params.extend(target_ids)
+    sql = (sql + ' RETURNING {target}').format(**names)
+    return _execute(connection, sql, params)
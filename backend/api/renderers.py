@@ -0,0 +1,66 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Рендерер для согласования формата выгрузки списка покупок.
+
+    Сам список отдаётся потоковым ответом в обход рендерера, поэтому
+    через него проходят только сообщения об ошибках.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data).encode(self.charset)
+
+
+class PlainTextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class CSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с тем же выводом, что и у ``JSONRenderer``.
+
+    Используется только для компактного вывода без экранирования
+    не-ASCII символов, как в настройках DRF по умолчанию. Отступы,
+    другие настройки и отсутствие orjson обрабатывает родительский класс.
+    """
+
+    encoder = JSONEncoder()
+    options = (
+        orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson else None
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data, default=self.encoder.default, option=self.options
+        )
+        # Как и JSONRenderer, экранируем U+2028 и U+2029 для JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
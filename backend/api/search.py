@@ -0,0 +1,131 @@
+import heapq
+import re
+from collections import defaultdict
+from threading import Lock
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
+from django.db import connections
+from django.db.models import Case, F, Func, IntegerField, Value, When
+
+from api.versions import get_version
+from backend.db import use_primary
+from recipes.models import Recipe
+
+SEARCH_CONFIG = 'russian'
+TOKEN_RE = re.compile(r'\w+')
+NAME_WEIGHT = 2
+TEXT_WEIGHT = 1
+# Сколько лучших совпадений отдаёт индекс в памяти. ID попадают в SQL
+# дважды, а SQLite ограничивает запрос 999 параметрами.
+FALLBACK_MAX_RESULTS = 400
+
+
+class RecipeSearchVector(Func):
+    """Тот же ``tsvector``, по которому построен GIN-индекс рецептов."""
+
+    template = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, %(expressions)s)"
+    arg_joiner = " || ' ' || "
+    output_field = SearchVectorField()
+
+    def __init__(self):
+        super().__init__(F('name'), F('text'))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.casefold())
+
+
+class RecipeSearchIndex:
+    """Инвертированный индекс рецептов в памяти для баз без ``tsvector``.
+
+    Используется с SQLite в тестах и при локальном запуске. Совпадения
+    в названии весят больше совпадений в описании, в выдачу попадают
+    рецепты, содержащие все слова запроса.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._index = None
+
+    def _get_postings(self):
+        version = get_version('recipes_search')
+        index = self._index
+        if index is not None and index[0] == version:
+            return index[1]
+        with self._lock:
+            if self._index is None or self._index[0] != version:
+                postings = defaultdict(lambda: defaultdict(int))
+                recipes = Recipe.objects.values_list('id', 'name', 'text')
+                with use_primary():
+                    for pk, name, text in recipes.iterator():
+                        for token in tokenize(name):
+                            postings[token][pk] += NAME_WEIGHT
+                        for token in tokenize(text):
+                            postings[token][pk] += TEXT_WEIGHT
+                self._index = (version, postings)
+            return self._index[1]
+
+    def search(self, query, limit, within=None):
+        """Не более ``limit`` пар (ID рецепта, вес) по убыванию веса.
+
+        ``within`` ограничивает поиск заданным множеством ID.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        postings = self._get_postings()
+        matches = [postings.get(term, {}) for term in terms]
+        found = set.intersection(*(set(match) for match in matches))
+        if within is not None:
+            found &= within
+        return heapq.nsmallest(
+            limit,
+            ((pk, sum(match[pk] for match in matches)) for pk in found),
+            key=lambda item: (-item[1], -item[0]),
+        )
+
+
+recipe_search_index = RecipeSearchIndex()
+
+
+def search_recipes(queryset, query):
+    """Фильтрует рецепты по тексту и сортирует их по релевантности.
+
+    Без PostgreSQL выдача ограничена ``FALLBACK_MAX_RESULTS`` самыми
+    релевантными рецептами, а вес задаётся одним условием ``CASE``
+    на каждое значение веса, а не на каждый рецепт. Если рецепты уже
+    отфильтрованы, ограничение применяется к подходящим под фильтры.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return (
+            queryset.alias(search_vector=RecipeSearchVector())
+            .filter(search_vector=search_query)
+            .annotate(
+                search_rank=SearchRank(RecipeSearchVector(), search_query)
+            )
+            .order_by('-search_rank', '-id')
+        )
+    within = None
+    if queryset.query.has_filters():
+        within = set(queryset.values_list('id', flat=True))
+    ranked = recipe_search_index.search(query, FALLBACK_MAX_RESULTS, within)
+    weights = defaultdict(list)
+    for pk, weight in ranked:
+        weights[weight].append(pk)
+    return (
+        queryset.filter(id__in=[pk for pk, _ in ranked])
+        .annotate(
+            search_rank=Case(
+                *(
+                    When(id__in=ids, then=Value(weight))
+                    for weight, ids in weights.items()
+                ),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by('-search_rank', '-id')
+    )
@@ -1,9 +1,14 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from api.images import clear_variants, schedule_variants
+from feed.models import FeedItem
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from shopping.models import ShoppingListItem
 
 User = get_user_model()
 
@@ -16,6 +21,9 @@ class CustomUserSerializer(UserSerializer):
         user = self.context['request'].user
         if user.is_anonymous:
             return False
+        viewer = self.context.get('viewer')
+        if viewer is not None:
+            return viewer.is_subscribed(obj.id)
         return user.following.filter(following=obj).exists()
 
     class Meta:
@@ -27,6 +35,8 @@ class CustomUserSerializer(UserSerializer):
             'last_name',
             'username',
             'avatar',
+            'avatar_thumbnail',
+            'avatar_webp',
             'is_subscribed',
         )
 
@@ -49,6 +59,14 @@ class AvatarSerializer(serializers.Serializer):
     avatar = Base64ImageField()
 
 
+class BulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_ACTION_MAX_IDS,
+    )
+
+
 class ExtendedCustomUserSerializer(CustomUserSerializer):
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
@@ -61,17 +79,21 @@ class ExtendedCustomUserSerializer(CustomUserSerializer):
 
     @staticmethod
     def get_recipes_count(obj):
-        return obj.recipes.count()
+        return obj.recipes_count
 
     def to_representation(self, instance):
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = instance.recipes.all()
-        if recipes_limit:
-            recipes = recipes[: int(recipes_limit)]
+        author_recipes = self.context.get('author_recipes')
+        if author_recipes is not None:
+            recipes = author_recipes.get(instance.id, [])
+        else:
+            request = self.context.get('request')
+            recipes_limit = request.query_params.get('recipes_limit')
+            recipes = instance.recipes.all()
+            if recipes_limit:
+                recipes = recipes[: int(recipes_limit)]
         user_data = CustomUserSerializer(instance, context=self.context).data
         user_data['recipes'] = ShortRecipeSerializer(recipes, many=True).data
-        user_data['recipes_count'] = instance.recipes.count()
+        user_data['recipes_count'] = instance.recipes_count
         return user_data
 
     class Meta:
@@ -95,10 +117,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class RecipeIngredientWriteSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient',
-    )
+    id = serializers.IntegerField(min_value=1, source='ingredient_id')
     amount = serializers.IntegerField(min_value=1)
 
     class Meta:
@@ -136,12 +155,18 @@ class RecipeSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         if user.is_anonymous:
             return False
+        viewer = self.context.get('viewer')
+        if viewer is not None:
+            return viewer.is_favorited(obj.id)
         return obj.favorites.filter(user=user).exists()
 
     def get_is_in_shopping_cart(self, obj):
         user = self.context['request'].user
         if user.is_anonymous:
             return False
+        viewer = self.context.get('viewer')
+        if viewer is not None:
+            return viewer.is_in_shopping_cart(obj.id)
         return obj.shopping_cart.filter(user=user).exists()
 
     def validate(self, data):
@@ -162,14 +187,22 @@ class RecipeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Для создания рецепта необходим хотя бы один ингредиент'
             )
-        ingredients = []
-        for item in value:
-            ingredient = item['ingredient']
-            if ingredient in ingredients:
-                raise serializers.ValidationError(
-                    'Ингредиенты не должны повторяться'
+        ingredient_ids = {item['ingredient_id'] for item in value}
+        if len(ingredient_ids) < len(value):
+            raise serializers.ValidationError(
+                'Ингредиенты не должны повторяться'
+            )
+        missing = ingredient_ids.difference(
+            Ingredient.objects.filter(id__in=ingredient_ids).values_list(
+                'id', flat=True
+            )
+        )
+        if missing:
+            raise serializers.ValidationError(
+                'Ингредиенты не найдены: {}'.format(
+                    ', '.join(map(str, sorted(missing)))
                 )
-            ingredients.append(ingredient)
+            )
         return value
 
     @staticmethod
@@ -191,36 +224,80 @@ class RecipeSerializer(serializers.ModelSerializer):
         return value
 
     @staticmethod
-    def set_ingredients_and_tags(recipe, ingredients, tags):
+    def set_ingredients_and_tags(recipe, ingredients, tags, created=False):
+        """Приводит ингредиенты и теги рецепта к переданным.
+
+        Для существующего рецепта меняются только отличающиеся строки
+        ``RecipeIngredient``, а разница количеств переносится в списки
+        покупок.
+        """
         recipe.tags.set(tags)
-        recipe.recipeingredient_set.all().delete()
-        ingredients = [
-            RecipeIngredient(
-                recipe=recipe,
-                ingredient=ingredient['ingredient'],
-                amount=ingredient['amount'],
-            )
-            for ingredient in ingredients
-        ]
-        RecipeIngredient.objects.bulk_create(ingredients)
+        current = {}
+        if not created:
+            current = {
+                ingredient_id: (pk, amount)
+                for pk, ingredient_id, amount in (
+                    recipe.recipeingredient_set.values_list(
+                        'id', 'ingredient_id', 'amount'
+                    )
+                )
+            }
+        to_create = []
+        to_update = []
+        deltas = {}
+        for item in ingredients:
+            ingredient_id, amount = item['ingredient_id'], item['amount']
+            pk, old_amount = current.pop(ingredient_id, (None, 0))
+            if amount == old_amount:
+                continue
+            deltas[ingredient_id] = amount - old_amount
+            if pk is None:
+                to_create.append(
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient_id=ingredient_id,
+                        amount=amount,
+                    )
+                )
+            else:
+                to_update.append(RecipeIngredient(id=pk, amount=amount))
+        for ingredient_id, (_, old_amount) in current.items():
+            deltas[ingredient_id] = -old_amount
+
+        RecipeIngredient.objects.bulk_create(to_create)
+        RecipeIngredient.objects.bulk_update(to_update, ('amount',))
+        if current:
+            RecipeIngredient.objects.filter(
+                id__in=[pk for pk, _ in current.values()]
+            ).delete()
+        if not created:
+            ShoppingListItem.objects.propagate_recipe_change(recipe, deltas)
 
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        recipe = Recipe.objects.create(
-            author=self.context['request'].user, **validated_data
-        )
-
-        self.set_ingredients_and_tags(recipe, ingredients, tags)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(
+                author=self.context['request'].user, **validated_data
+            )
+            self.set_ingredients_and_tags(
+                recipe, ingredients, tags, created=True
+            )
+            FeedItem.objects.fan_out(recipe)
+            schedule_variants(recipe, 'image')
 
         return recipe
 
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        super().update(instance, validated_data)
-
-        self.set_ingredients_and_tags(instance, ingredients, tags)
+        with transaction.atomic():
+            if 'image' in validated_data:
+                clear_variants(instance, 'image')
+            super().update(instance, validated_data)
+            self.set_ingredients_and_tags(instance, ingredients, tags)
+            if 'image' in validated_data:
+                schedule_variants(instance, 'image')
 
         return instance
 
@@ -243,6 +320,8 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_thumbnail',
+            'image_webp',
             'text',
             'cooking_time',
         )
@@ -255,5 +334,86 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_thumbnail',
+            'image_webp',
             'cooking_time',
         )
+
+
+class RecipeReadSerializer(serializers.BaseSerializer):
+    """Быстрое чтение рецептов в обход полей DRF.
+
+    Возвращает тот же JSON, что и ``RecipeSerializer``, собирая словари
+    напрямую из объектов. Теги, автор и ингредиенты должны быть заранее
+    подгружены через ``select_related``/``prefetch_related``.
+    """
+
+    def file_url(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        if request is None:
+            return value.url
+        return request.build_absolute_uri(value.url)
+
+    def viewer_flag(self, obj, name, related):
+        user = self.context['request'].user
+        if user.is_anonymous:
+            return False
+        viewer = self.context.get('viewer')
+        if viewer is not None:
+            return getattr(viewer, name)(obj.id)
+        return related.filter(user=user).exists()
+
+    def author_representation(self, recipe):
+        author = recipe.author
+        user = self.context['request'].user
+        viewer = self.context.get('viewer')
+        if user.is_anonymous:
+            is_subscribed = False
+        elif viewer is not None:
+            is_subscribed = viewer.is_subscribed(author.id)
+        else:
+            is_subscribed = user.following.filter(following=author).exists()
+        return {
+            'id': author.id,
+            'email': author.email,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+            'username': author.username,
+            'avatar': self.file_url(author.avatar),
+            'avatar_thumbnail': self.file_url(author.avatar_thumbnail),
+            'avatar_webp': self.file_url(author.avatar_webp),
+            'is_subscribed': is_subscribed,
+        }
+
+    def to_representation(self, recipe):
+        return {
+            'id': recipe.id,
+            'tags': [
+                {'id': tag.id, 'name': tag.name, 'slug': tag.slug}
+                for tag in recipe.tags.all()
+            ],
+            'author': self.author_representation(recipe),
+            'is_favorited': self.viewer_flag(
+                recipe, 'is_favorited', recipe.favorites
+            ),
+            'is_in_shopping_cart': self.viewer_flag(
+                recipe, 'is_in_shopping_cart', recipe.shopping_cart
+            ),
+            'name': recipe.name,
+            'image': self.file_url(recipe.image),
+            'image_thumbnail': self.file_url(recipe.image_thumbnail),
+            'image_webp': self.file_url(recipe.image_webp),
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'ingredients': [
+                {
+                    'id': item.ingredient.id,
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.recipeingredient_set.all()
+            ],
+        }
@@ -0,0 +1,165 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.indexes import recipe_ids
+from api.versions import bump_version
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from shopping.models import ShoppingListItem
+
+User = get_user_model()
+
+# Поля автора, которые выводятся в ответах с рецептами.
+AUTHOR_FIELDS = frozenset(
+    (
+        'email',
+        'first_name',
+        'last_name',
+        'username',
+        'avatar',
+        'avatar_thumbnail',
+        'avatar_webp',
+    )
+)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredients_version(**kwargs):
+    bump_version('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(**kwargs):
+    bump_version('tags')
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_recipe_id(instance, **kwargs):
+    # После удаления Django обнуляет ``pk`` экземпляра.
+    pk = instance.pk
+    transaction.on_commit(lambda: recipe_ids.discard(pk))
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_from_shopping_lists(instance, **kwargs):
+    ShoppingListItem.objects.propagate_recipe_change(
+        instance, ShoppingListItem.objects.recipe_amounts(instance, sign=-1)
+    )
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def bump_recipes_search_version(**kwargs):
+    bump_version('recipes_search')
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_recipes_version(**kwargs):
+    transaction.on_commit(lambda: bump_version('recipes'))
+
+
+def author_values(user):
+    return [
+        User._meta.get_field(name).get_prep_value(getattr(user, name)) or ''
+        for name in sorted(AUTHOR_FIELDS)
+    ]
+
+
+@receiver(pre_save, sender=User)
+def detect_author_changes(instance, update_fields, **kwargs):
+    """Сравнивает выводимые поля автора с базой перед полным ``save``."""
+    if instance.pk is None or update_fields is not None:
+        return
+    saved = User.objects.filter(pk=instance.pk).only(*AUTHOR_FIELDS).first()
+    instance._author_changed = saved is None or (
+        author_values(saved) != author_values(instance)
+    )
+
+
+@receiver(post_save, sender=User)
+def bump_recipes_version_on_author_change(
+    instance, created, update_fields, **kwargs
+):
+    """Сбрасывает кеш рецептов, только если изменились данные автора.
+
+    Вход пользователя (``last_login``), регистрация и смена пароля
+    ответы с рецептами не меняют.
+    """
+    if created:
+        return
+    if update_fields is not None:
+        changed = not AUTHOR_FIELDS.isdisjoint(update_fields)
+    else:
+        changed = instance.__dict__.pop('_author_changed', True)
+    if changed:
+        transaction.on_commit(lambda: bump_version('recipes'))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def touch_recipe_on_ingredients_change(instance, **kwargs):
+    Recipe.objects.filter(id=instance.recipe_id).touch()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_recipes_on_tags_change(instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        Recipe.objects.filter(id=instance.pk).touch()
+    elif reverse and action in ('post_add', 'post_remove'):
+        Recipe.objects.filter(id__in=pk_set).touch()
+    elif reverse and action == 'pre_clear':
+        Recipe.objects.filter(tags=instance).touch()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_recipes_on_tag_change(instance, **kwargs):
+    Recipe.objects.filter(tags=instance).touch()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_on_ingredient_change(instance, **kwargs):
+    Recipe.objects.filter(ingredients=instance).touch()
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(instance, created, **kwargs):
+    if created:
+        User.objects.filter(id=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(instance, **kwargs):
+    User.objects.filter(id=instance.author_id).update(
+        recipes_count=F('recipes_count') - 1
+    )
+
+
+@receiver(pre_delete, sender=User)
+def release_user_counters(instance, **kwargs):
+    Recipe.objects.filter(favorites__user=instance).update(
+        favorites_count=F('favorites_count') - 1
+    )
+    Recipe.objects.filter(shopping_cart__user=instance).update(
+        in_carts_count=F('in_carts_count') - 1
+    )
+    User.objects.filter(followers__follower=instance).update(
+        followers_count=F('followers_count') - 1
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Token)
+def forget_cached_tokens(sender, instance, **kwargs):
+    user_id = instance.pk if sender is User else instance.user_id
+    transaction.on_commit(lambda: token_cache.forget(user_id))
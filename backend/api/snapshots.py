@@ -0,0 +1,89 @@
+import gzip
+import hashlib
+import re
+from threading import Lock
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from api.renderers import ORJSONRenderer
+from api.serializers import IngredientSerializer, TagSerializer
+from api.versions import get_version
+from backend.db import use_primary
+from recipes.models import Ingredient, Tag
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+class Snapshot:
+    def __init__(self, version, content):
+        self.version = version
+        self.content = content
+        self.gzipped = gzip.compress(content)
+        self.etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        self.gzipped_etag = f'"{self.etag[1:-1]}-gz"'
+
+
+class CatalogSnapshot:
+    """Готовый JSON справочника, собираемый заново только при смене версии.
+
+    Версия справочника увеличивается сигналами при изменении его
+    записей, а сам снимок хранится в памяти процесса вместе со сжатой
+    копией и ETag.
+    """
+
+    def __init__(self, name, queryset, serializer_class):
+        self.name = name
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self._lock = Lock()
+        self._snapshot = None
+
+    def get(self):
+        version = get_version(self.name)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                with use_primary():
+                    data = self.serializer_class(
+                        self.queryset.all(), many=True
+                    ).data
+                self._snapshot = Snapshot(
+                    version, ORJSONRenderer().render(data)
+                )
+            return self._snapshot
+
+    def response(self, request):
+        snapshot = self.get()
+        use_gzip = ACCEPTS_GZIP.search(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        etag = snapshot.gzipped_etag if use_gzip else snapshot.etag
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if (
+            '*' in if_none_match
+            or snapshot.etag in if_none_match
+            or snapshot.gzipped_etag in if_none_match
+        ):
+            response = HttpResponseNotModified()
+        elif use_gzip:
+            response = HttpResponse(
+                snapshot.gzipped, content_type='application/json'
+            )
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(
+                snapshot.content, content_type='application/json'
+            )
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+ingredients_snapshot = CatalogSnapshot(
+    'ingredients', Ingredient.objects.all(), IngredientSerializer
+)
+tags_snapshot = CatalogSnapshot('tags', Tag.objects.all(), TagSerializer)
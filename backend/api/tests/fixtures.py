@@ -0,0 +1,32 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+
+from recipes.models import Ingredient
+
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=='
+)
+
+
+def seed(users=5, recipes=60, **options):
+    """Заполняет базу командой ``seed_data`` и сбрасывает кеш.
+
+    Несколько ингредиентов создаются заранее, чтобы команда
+    не загружала полный справочник.
+    """
+    cache.clear()
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+        for number in range(30)
+    )
+    call_command(
+        'seed_data',
+        users=users,
+        recipes=recipes,
+        password='test-password',
+        stdout=StringIO(),
+        **options,
+    )
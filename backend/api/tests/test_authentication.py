@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import VERSION_NAME, TokenCache, token_cache
+from api.tests.fixtures import PNG
+from api.versions import get_version
+
+User = get_user_model()
+
+PASSWORD = 'old-Passw0rd'
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Пользователь из кеша токенов не затирает счётчики."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password=PASSWORD
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        User.objects.filter(id=self.user.id).update(
+            followers_count=5, recipes_count=7
+        )
+
+    def assert_cache_hit(self, request):
+        hits = token_cache.stats()['hits']
+        response = request()
+        self.assertEqual(token_cache.stats()['hits'], hits + 1)
+        return response
+
+    def assert_counters_kept(self):
+        self.user.refresh_from_db()
+        self.assertEqual(
+            (self.user.followers_count, self.user.recipes_count), (5, 7)
+        )
+
+    def test_set_password(self):
+        response = self.assert_cache_hit(
+            lambda: self.client.post(
+                '/api/users/set_password/',
+                {'current_password': PASSWORD, 'new_password': 'new-Passw0rd'},
+                format='json',
+            )
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assert_counters_kept()
+        self.assertTrue(self.user.check_password('new-Passw0rd'))
+
+    def test_avatar(self):
+        response = self.assert_cache_hit(
+            lambda: self.client.put(
+                '/api/users/me/avatar/', {'avatar': PNG}, format='json'
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_counters_kept()
+
+    def test_counters_read_from_database(self):
+        key = Token.objects.get(user=self.user).key
+        cached, _ = token_cache.get(key)
+        self.assertEqual(cached.recipes_count, 7)
+        shared = TokenCache(size=10, timeout=60, shared=True)
+        shared.set(
+            key,
+            self.user,
+            Token.objects.get(key=key),
+            get_version(VERSION_NAME.format(self.user.id)),
+        )
+        cached, _ = TokenCache(size=10, timeout=60, shared=True).get(key)
+        self.assertEqual(cached.followers_count, 5)
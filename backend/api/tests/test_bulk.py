@@ -0,0 +1,192 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import seed
+from api.tests.test_shopping_list import recomputed, stored
+from favorites.models import Favorite
+from recipes.models import Recipe
+from shopping.models import ShoppingCart, ShoppingListItem
+from users.models import Subscription
+
+User = get_user_model()
+
+MISSING_ID = 10**6
+
+
+class BulkActionsTest(TestCase):
+    """Массовые действия возвращают статус по каждому идентификатору."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(
+            users=4, recipes=10, favorites=0, shopping_cart=0, subscriptions=0
+        )
+        cls.user, *cls.authors = User.objects.order_by('id')
+        cls.recipes = list(Recipe.objects.order_by('id')[:3])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, method, url, ids):
+        response = getattr(self.client, method)(
+            url, {'ids': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return [
+            (result['id'], result['status'])
+            for result in response.json()['results']
+        ]
+
+    def counters(self, field):
+        return list(
+            Recipe.objects.filter(
+                id__in=[recipe.id for recipe in self.recipes]
+            )
+            .order_by('id')
+            .values_list(field, flat=True)
+        )
+
+    def test_favorite(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        url = '/api/recipes/favorite/'
+        Favorite.objects.create(user=self.user, recipe_id=first)
+        before = self.counters('favorites_count')
+
+        self.assertEqual(
+            self.bulk('post', url, [first, second, second, MISSING_ID]),
+            [
+                (first, 'exists'),
+                (second, 'created'),
+                (MISSING_ID, 'not_found'),
+            ],
+        )
+        self.assertEqual(
+            self.counters('favorites_count'),
+            [before[0], before[1] + 1, before[2]],
+        )
+
+        self.assertEqual(
+            self.bulk('delete', url, [second, third, MISSING_ID]),
+            [
+                (second, 'deleted'),
+                (third, 'absent'),
+                (MISSING_ID, 'not_found'),
+            ],
+        )
+        self.assertEqual(self.counters('favorites_count'), before)
+        self.assertEqual(
+            set(
+                Favorite.objects.filter(user=self.user).values_list(
+                    'recipe_id', flat=True
+                )
+            ),
+            {first},
+        )
+
+    def test_shopping_cart(self):
+        ids = [recipe.id for recipe in self.recipes]
+        url = '/api/recipes/shopping_cart/'
+        before = self.counters('in_carts_count')
+
+        self.assertEqual(
+            self.bulk('post', url, [*ids, ids[0]]),
+            [(pk, 'created') for pk in ids],
+        )
+        self.assertEqual(
+            self.counters('in_carts_count'),
+            [count + 1 for count in before],
+        )
+        self.assertTrue(stored())
+        self.assertEqual(stored(), recomputed())
+
+        self.assertEqual(
+            self.bulk('delete', url, ids[:1]), [(ids[0], 'deleted')]
+        )
+        self.assertEqual(stored(), recomputed())
+
+        response = self.client.delete('/api/recipes/shopping_cart/clear/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingCart.objects.filter(user=self.user).exists())
+        self.assertFalse(
+            ShoppingListItem.objects.filter(user=self.user).exists()
+        )
+        self.assertEqual(self.counters('in_carts_count'), before)
+
+    def test_subscribe(self):
+        first, second, third = self.authors
+        url = '/api/users/subscribe/'
+
+        self.assertEqual(
+            self.bulk(
+                'post', url, [self.user.id, first.id, first.id, MISSING_ID]
+            ),
+            [
+                (self.user.id, 'rejected'),
+                (first.id, 'created'),
+                (MISSING_ID, 'not_found'),
+            ],
+        )
+        self.assertEqual(
+            self.bulk('post', url, [first.id, second.id]),
+            [(first.id, 'exists'), (second.id, 'created')],
+        )
+        self.assertEqual(
+            list(
+                User.objects.filter(id__in=(first.id, second.id, third.id))
+                .order_by('id')
+                .values_list('followers_count', flat=True)
+            ),
+            [1, 1, 0],
+        )
+
+        self.assertEqual(
+            self.bulk('delete', url, [second.id, third.id]),
+            [(second.id, 'deleted'), (third.id, 'absent')],
+        )
+        self.assertEqual(
+            list(
+                Subscription.objects.filter(follower=self.user).values_list(
+                    'following_id', flat=True
+                )
+            ),
+            [first.id],
+        )
+        second.refresh_from_db()
+        self.assertEqual(second.followers_count, 0)
+
+    def test_invalid_ids(self):
+        for ids in ([], ['abc'], [0]):
+            with self.subTest(ids=ids):
+                response = self.client.post(
+                    '/api/recipes/favorite/', {'ids': ids}, format='json'
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+class MalformedIdTest(TestCase):
+    """Одиночные действия отвечают 404 на нечисловые идентификаторы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=2, recipes=3)
+        cls.user = User.objects.order_by('id').first()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_delete(self):
+        for url in (
+            '/api/recipes/{}/favorite/',
+            '/api/recipes/{}/shopping_cart/',
+            '/api/users/{}/subscribe/',
+        ):
+            for pk in ('%C2%B2', 'abc', '999999'):
+                with self.subTest(url=url, pk=pk):
+                    response = self.client.delete(url.format(pk))
+                    self.assertEqual(response.status_code, 404)
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.versions import get_version
+
+User = get_user_model()
+
+
+class RecipesVersionTest(TestCase):
+    """Кеш рецептов сбрасывается только при изменении данных автора."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+
+    def assert_bumped(self, bumped, change):
+        version = get_version('recipes')
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertEqual(get_version('recipes') != version, bumped)
+
+    def test_signup(self):
+        self.assert_bumped(
+            False,
+            lambda: User.objects.create_user(
+                username='new', email='new@example.com', password='x'
+            ),
+        )
+
+    def test_login(self):
+        self.assert_bumped(False, lambda: update_last_login(None, self.user))
+
+    def test_password_change(self):
+        def change():
+            self.user.set_password('new-password')
+            self.user.save()
+
+        self.assert_bumped(False, change)
+
+    def test_name_change(self):
+        def change():
+            self.user.first_name = 'Анна'
+            self.user.save()
+
+        self.assert_bumped(True, change)
+
+    def test_update_fields(self):
+        def change():
+            self.user.username = 'renamed'
+            self.user.save(update_fields=('username',))
+
+        self.assert_bumped(True, change)
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import seed
+from favorites.models import Favorite
+from recipes.models import Recipe
+from shopping.models import ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+THREADS = 8
+
+
+class ConcurrentToggleTest(TransactionTestCase):
+    """Параллельные одинаковые запросы создают ровно одну связь."""
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('SQLite в памяти блокирует таблицы между потоками')
+        seed(
+            users=2, recipes=3, favorites=0, shopping_cart=0, subscriptions=0
+        )
+        self.user, self.author = User.objects.order_by('id')
+        self.recipe = Recipe.objects.order_by('id').first()
+
+    def post_in_parallel(self, path):
+        barrier = Barrier(THREADS)
+
+        def post():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                return client.post(path).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(THREADS) as executor:
+            futures = [executor.submit(post) for _ in range(THREADS)]
+        return sorted(future.result() for future in futures)
+
+    def assert_one_created(self, statuses):
+        self.assertEqual(statuses, [201] + [400] * (THREADS - 1))
+
+    def test_favorite(self):
+        self.assert_one_created(
+            self.post_in_parallel(f'/api/recipes/{self.recipe.id}/favorite/')
+        )
+        self.assertEqual(
+            Favorite.objects.filter(user=self.user).count(), 1
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_shopping_cart(self):
+        self.assert_one_created(
+            self.post_in_parallel(
+                f'/api/recipes/{self.recipe.id}/shopping_cart/'
+            )
+        )
+        self.assertEqual(
+            ShoppingCart.objects.filter(user=self.user).count(), 1
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.in_carts_count, 1)
+
+    def test_subscribe(self):
+        self.assert_one_created(
+            self.post_in_parallel(f'/api/users/{self.author.id}/subscribe/')
+        )
+        self.assertEqual(
+            Subscription.objects.filter(follower=self.user).count(), 1
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
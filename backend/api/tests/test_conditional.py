@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import seed
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class ViewerETagTest(TestCase):
+    """ETag учитывает отметки текущего пользователя."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(
+            users=3, recipes=10, favorites=0, shopping_cart=0, subscriptions=0
+        )
+        cls.user = User.objects.order_by('id').first()
+        cls.recipe = Recipe.objects.exclude(author=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.paths = (
+            f'/api/recipes/{self.recipe.id}/',
+            f'/api/recipes/?author={self.recipe.author_id}',
+            f'/api/users/{self.recipe.author_id}/',
+        )
+
+    def etag(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def assert_toggle_changes_etag(self, toggle_path, paths):
+        before = {path: self.etag(path) for path in paths}
+        self.assertEqual(self.client.post(toggle_path).status_code, 201)
+        for path in paths:
+            with self.subTest(path=path, state='on'):
+                response = self.client.get(
+                    path, HTTP_IF_NONE_MATCH=before[path]
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], before[path])
+        self.assertEqual(self.client.delete(toggle_path).status_code, 204)
+        for path in paths:
+            with self.subTest(path=path, state='off'):
+                self.assertEqual(self.etag(path), before[path])
+
+    def test_favorite(self):
+        self.assert_toggle_changes_etag(
+            f'/api/recipes/{self.recipe.id}/favorite/', self.paths[:2]
+        )
+
+    def test_shopping_cart(self):
+        self.assert_toggle_changes_etag(
+            f'/api/recipes/{self.recipe.id}/shopping_cart/', self.paths[:2]
+        )
+
+    def test_subscribe(self):
+        self.assert_toggle_changes_etag(
+            f'/api/users/{self.recipe.author_id}/subscribe/', self.paths
+        )
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import PNG, seed
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class AvatarCountersTest(TestCase):
+    """Смена аватара не затирает счётчики устаревшим ``request.user``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=3, recipes=10)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.filter(recipes_count__gt=0).first()
+        self.client = APIClient()
+        # Экземпляр загружен до изменения счётчиков, как копия из кеша
+        # токенов.
+        self.client.force_authenticate(self.user)
+        User.objects.filter(id=self.user.id).update(
+            followers_count=5, recipes_count=7
+        )
+
+    def assert_counters_kept(self):
+        self.user.refresh_from_db()
+        self.assertEqual(
+            (self.user.followers_count, self.user.recipes_count), (5, 7)
+        )
+
+    def test_put(self):
+        response = self.client.put(
+            '/api/users/me/avatar/', {'avatar': PNG}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_counters_kept()
+        self.assertTrue(self.user.avatar)
+
+    def test_delete(self):
+        response = self.client.delete('/api/users/me/avatar/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_counters_kept()
+        self.assertFalse(self.user.avatar)
+
+
+class RecipeCountersTest(TestCase):
+    """Полное сохранение рецепта не затирает счётчики устаревшими."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=3, recipes=10)
+
+    def test_save_keeps_counters(self):
+        recipe = Recipe.objects.first()
+        Recipe.objects.filter(id=recipe.id).update(
+            favorites_count=5, in_carts_count=7
+        )
+        recipe.name = 'Новое название'
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(
+            (recipe.favorites_count, recipe.in_carts_count), (5, 7)
+        )
+
+    def test_create_saves_counters(self):
+        recipe = Recipe.objects.first()
+        recipe.pk = None
+        recipe._state.adding = True
+        recipe.favorites_count = 3
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 3)
@@ -0,0 +1,72 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import seed
+from recipes.models import Recipe
+
+User = get_user_model()
+
+FORMATS = ('txt', 'csv', 'json')
+
+
+class ShoppingListExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=3, recipes=10, shopping_cart=0)
+        cls.user = User.objects.order_by('id').first()
+        cls.recipes = list(Recipe.objects.order_by('id')[:2])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post(f'/api/recipes/{self.recipes[0].id}/shopping_cart/')
+
+    def download(self, file_format, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(
+            '/api/recipes/download_shopping_cart/',
+            {'format': file_format},
+            **headers,
+        )
+
+    def test_formats(self):
+        for file_format in FORMATS:
+            with self.subTest(file_format=file_format):
+                response = self.download(file_format)
+                self.assertEqual(response.status_code, 200)
+                content = b''.join(response.streaming_content).decode()
+                self.assertIn(
+                    f'shopping_cart.{file_format}',
+                    response['Content-Disposition'],
+                )
+                if file_format == 'json':
+                    self.assertEqual(
+                        len(json.loads(content)),
+                        self.recipes[0].ingredients.count(),
+                    )
+
+    def test_not_modified(self):
+        for file_format in FORMATS:
+            with self.subTest(file_format=file_format):
+                etag = self.download(file_format)['ETag']
+                response = self.download(file_format, etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_list(self):
+        etags = {
+            file_format: self.download(file_format)['ETag']
+            for file_format in FORMATS
+        }
+        self.assertEqual(len(set(etags.values())), len(FORMATS))
+        self.client.post(f'/api/recipes/{self.recipes[1].id}/shopping_cart/')
+        for file_format, etag in etags.items():
+            with self.subTest(file_format=file_format):
+                response = self.download(file_format, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
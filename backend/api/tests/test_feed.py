@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import PNG, seed
+from feed.models import FeedItem
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=4, recipes=20, subscriptions=0)
+        cls.user, cls.author, cls.other, cls.follower = User.objects.order_by(
+            'id'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def feed_ids(self, user):
+        return set(
+            FeedItem.objects.filter(user=user).values_list(
+                'recipe_id', flat=True
+            )
+        )
+
+    def recipe_ids(self, *authors):
+        return set(
+            Recipe.objects.filter(author__in=authors).values_list(
+                'id', flat=True
+            )
+        )
+
+    def test_subscribe_backfills_and_unsubscribe_prunes(self):
+        self.assertTrue(self.recipe_ids(self.author))
+        response = self.client.post(f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            self.feed_ids(self.user), self.recipe_ids(self.author)
+        )
+
+        response = self.client.get('/api/recipes/feed/', {'limit': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {recipe['id'] for recipe in response.json()['results']},
+            self.recipe_ids(self.author),
+        )
+
+        response = self.client.delete(
+            f'/api/users/{self.author.id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.feed_ids(self.user), set())
+
+    def test_bulk_subscribe(self):
+        ids = [self.author.id, self.other.id]
+        response = self.client.post(
+            '/api/users/subscribe/', {'ids': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            self.feed_ids(self.user),
+            self.recipe_ids(self.author, self.other),
+        )
+
+        response = self.client.delete(
+            '/api/users/subscribe/', {'ids': [self.other.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            self.feed_ids(self.user), self.recipe_ids(self.author)
+        )
+
+    def test_fan_out_on_create(self):
+        for follower in (self.user, self.follower):
+            Subscription.objects.create(
+                follower=follower, following=self.author
+            )
+            FeedItem.objects.backfill(follower, (self.author.id,))
+        self.client.force_authenticate(self.author)
+        response = self.client.post(
+            '/api/recipes/',
+            {
+                'name': 'Новый рецепт',
+                'text': 'Описание',
+                'cooking_time': 5,
+                'image': PNG,
+                'tags': [Tag.objects.first().id],
+                'ingredients': [
+                    {'id': Ingredient.objects.first().id, 'amount': 1}
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        recipe_id = response.json()['id']
+        self.assertEqual(
+            set(
+                FeedItem.objects.filter(recipe_id=recipe_id).values_list(
+                    'user_id', flat=True
+                )
+            ),
+            {self.user.id, self.follower.id},
+        )
+        self.assertNotIn(recipe_id, self.feed_ids(self.other))
+
+    def test_fan_out_is_one_query(self):
+        recipe = Recipe.objects.filter(author=self.author).first()
+        Subscription.objects.bulk_create(
+            Subscription(follower=follower, following=self.author)
+            for follower in (self.user, self.other, self.follower)
+        )
+        with self.assertNumQueries(1):
+            FeedItem.objects.fan_out(recipe)
+        self.assertEqual(FeedItem.objects.filter(recipe=recipe).count(), 3)
+        with self.assertNumQueries(1):
+            FeedItem.objects.fan_out(recipe)
+        self.assertEqual(FeedItem.objects.filter(recipe=recipe).count(), 3)
@@ -0,0 +1,29 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.indexes import ingredient_index
+from recipes.models import Ingredient
+
+
+class IngredientIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        for name in ('Масло сливочное', 'масло', 'Сливочное масло', 'Мука'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def search(self, query):
+        return [item['name'] for item in ingredient_index.search(query)]
+
+    def test_exact_match_first(self):
+        self.assertEqual(
+            self.search('МАСЛО'), ['масло', 'Масло сливочное']
+        )
+
+    def test_no_substring_matches(self):
+        self.assertEqual(self.search('сливочное'), ['Сливочное масло'])
+        self.assertEqual(self.search('лоск'), [])
+
+    def test_rebuilt_on_change(self):
+        self.assertEqual(self.search('мук'), ['Мука'])
+        Ingredient.objects.create(name='Мука ржаная', measurement_unit='г')
+        self.assertEqual(self.search('мук'), ['Мука', 'Мука ржаная'])
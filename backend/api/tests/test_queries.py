@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import seed
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class RecipeQueryCountTest(TestCase):
+    """Число запросов на чтение рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=5, recipes=60)
+        cls.reader = User.objects.order_by('id').first()
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def count_queries(self, client, path):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_flat(self, client, path):
+        expected = self.count_queries(client, f'{path}limit=1')
+        cache.clear()
+        with self.assertNumQueries(expected):
+            response = client.get(f'{path}limit=50')
+        self.assertGreater(len(response.json()['results']), 1)
+
+    def test_list(self):
+        self.assert_flat(self.client, '/api/recipes/?')
+
+    def test_list_anonymous(self):
+        self.assert_flat(self.anonymous, '/api/recipes/?')
+
+    def test_list_cursor(self):
+        self.assert_flat(self.client, '/api/recipes/?pagination=cursor&')
+
+    def test_list_filtered(self):
+        self.assert_flat(
+            self.client, '/api/recipes/?tags=breakfast&tags=lunch&'
+        )
+
+    def test_detail(self):
+        recipes = Recipe.objects.annotate(
+            size=Count('recipeingredient')
+        ).order_by('size', 'id')
+        few = recipes.first()
+        many = recipes.last()
+        expected = self.count_queries(self.client, f'/api/recipes/{few.id}/')
+        with self.assertNumQueries(expected):
+            self.client.get(f'/api/recipes/{many.id}/')
@@ -0,0 +1,45 @@
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from backend.db import ReplicaMiddleware, ReplicaRouter, replica_alias
+from recipes.models import Recipe
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def alias_for(self, request):
+        seen = []
+
+        def get_response(request):
+            seen.append(replica_alias.get())
+            return HttpResponse()
+
+        ReplicaMiddleware(get_response)(request)
+        return seen[0]
+
+    def test_api_reads_use_replica(self):
+        request = self.factory.get('/api/recipes/')
+        self.assertEqual(self.alias_for(request), 'replica_1')
+
+    def test_api_writes_use_primary(self):
+        request = self.factory.post('/api/recipes/')
+        self.assertIsNone(self.alias_for(request))
+
+    def test_other_paths_use_primary(self):
+        for path in ('/admin/', '/admin/recipes/recipe/', '/rec/abc/'):
+            with self.subTest(path=path):
+                request = self.factory.get(path)
+                self.assertIsNone(self.alias_for(request))
+
+    def test_primary_models(self):
+        router = ReplicaRouter()
+        token = replica_alias.set('replica_1')
+        try:
+            self.assertEqual(router.db_for_read(Session), 'default')
+            self.assertEqual(router.db_for_read(Recipe), 'replica_1')
+        finally:
+            replica_alias.reset(token)
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import search
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class RecipeSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        author = User.objects.create(username='author', email='a@a.ru')
+        self.recipes = {
+            name: Recipe.objects.create(
+                author=author,
+                name=name,
+                text=text,
+                cooking_time=10,
+                image='recipies/test.png',
+            )
+            for name, text in (
+                ('Суп гороховый', 'Горох варить долго'),
+                ('Гороховая каша', 'Суп не варить'),
+                ('Борщ', 'Свёкла и капуста'),
+                ('Суп с фрикадельками', 'Суп на бульоне'),
+            )
+        }
+
+    def search(self, query, **params):
+        response = self.client.get(
+            '/api/recipes/', {'search': query, 'limit': 10, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.json()['results']]
+
+    def test_ranked_by_relevance(self):
+        self.assertEqual(
+            self.search('суп'),
+            ['Суп с фрикадельками', 'Суп гороховый', 'Гороховая каша'],
+        )
+
+    def test_all_terms_required(self):
+        self.assertEqual(
+            self.search('суп варить'), ['Суп гороховый', 'Гороховая каша']
+        )
+        self.assertEqual(self.search('борщ суп'), [])
+
+    def test_capped_after_filters(self):
+        author = User.objects.create(username='other', email='o@o.ru')
+        Recipe.objects.filter(name='Гороховая каша').update(author=author)
+        with mock.patch.object(search, 'FALLBACK_MAX_RESULTS', 1):
+            self.assertEqual(
+                self.search('суп', author=author.id), ['Гороховая каша']
+            )
+
+    def test_fallback_results_capped(self):
+        with mock.patch.object(search, 'FALLBACK_MAX_RESULTS', 2):
+            self.assertEqual(
+                self.search('суп'), ['Суп с фрикадельками', 'Суп гороховый']
+            )
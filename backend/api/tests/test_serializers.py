@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeReadSerializer, RecipeSerializer
+from api.tests.fixtures import seed
+from api.views import RecipeViewSet
+
+User = get_user_model()
+
+
+class RecipeReadSerializerGoldenTest(TestCase):
+    """Облегчённый сериализатор выдаёт те же байты, что и ``RecipeSerializer``.
+
+    Эталон строится прежним путём: ``RecipeSerializer`` без контекста
+    зрителя, флаги которого проверяются запросами ``exists()``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=5, recipes=30)
+        cls.reader = User.objects.order_by('id').first()
+        User.objects.filter(id__in=User.objects.order_by('id')[1:3]).update(
+            avatar='media/users/avatar.png',
+            avatar_thumbnail='media/users/variants/avatar_thumbnail.webp',
+            avatar_webp='media/users/variants/avatar.webp',
+        )
+
+    def render(self, user, action, recipes=None):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        view = RecipeViewSet(
+            request=request, action=action, format_kwarg=None, kwargs={}
+        )
+        if recipes is None:
+            recipes = list(view.get_queryset().order_by('-id'))
+        view.preload_viewer(recipes)
+        context = view.get_serializer_context()
+        legacy_context = {
+            key: value for key, value in context.items() if key != 'viewer'
+        }
+        many = action == 'list'
+        instance = recipes if many else recipes[0]
+        expected = JSONRenderer().render(
+            RecipeSerializer(instance, many=many, context=legacy_context).data
+        )
+        actual = ORJSONRenderer().render(
+            RecipeReadSerializer(instance, many=many, context=context).data
+        )
+        return expected, actual
+
+    def assert_identical(self, user):
+        expected, actual = self.render(user, 'list')
+        self.assertEqual(actual, expected)
+        for recipe in RecipeViewSet.queryset.order_by('id')[:5]:
+            expected, actual = self.render(user, 'retrieve', [recipe])
+            self.assertEqual(actual, expected)
+
+    def test_anonymous(self):
+        self.assert_identical(AnonymousUser())
+
+    def test_authenticated(self):
+        self.assert_identical(self.reader)
+        _, rendered = self.render(self.reader, 'list')
+        for fragment in (
+            b'"is_favorited":true',
+            b'"is_in_shopping_cart":true',
+            b'"is_subscribed":true',
+            b'avatar_thumbnail.webp"',
+        ):
+            self.assertIn(fragment, rendered)
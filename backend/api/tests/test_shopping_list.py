@@ -0,0 +1,202 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import seed
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from shopping.models import ShoppingCart, ShoppingListItem
+
+User = get_user_model()
+
+
+def recomputed():
+    """Списки покупок всех пользователей, пересчитанные по корзинам."""
+    return {
+        (row['recipe__shopping_cart__user'], row['ingredient']): row['total']
+        for row in RecipeIngredient.objects.filter(
+            recipe__shopping_cart__isnull=False
+        )
+        .values('recipe__shopping_cart__user', 'ingredient')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    }
+
+
+def stored():
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in (
+            ShoppingListItem.objects.values_list(
+                'user_id', 'ingredient_id', 'amount'
+            )
+        )
+    }
+
+
+class ShoppingListAggregateTest(TestCase):
+    """Агрегат списка покупок совпадает с полным пересчётом."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=5, recipes=20, shopping_cart=4)
+        cls.recipe = (
+            Recipe.objects.filter(shopping_cart__isnull=False)
+            .annotate(size=Count('recipeingredient', distinct=True))
+            .filter(size__gte=3)
+            .order_by('id')
+            .first()
+        )
+        cls.user = User.objects.exclude(shopping_cart__recipe=cls.recipe)[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.author = APIClient()
+        self.author.force_authenticate(self.recipe.author)
+
+    def assert_consistent(self):
+        self.assertEqual(stored(), recomputed())
+
+    def test_seeded(self):
+        self.assertTrue(stored())
+        self.assert_consistent()
+
+    def test_add_and_remove(self):
+        path = f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        self.assertEqual(self.client.post(path).status_code, 201)
+        self.assert_consistent()
+        self.assertEqual(self.client.delete(path).status_code, 204)
+        self.assert_consistent()
+
+    def edit(self, ingredients):
+        response = self.author.patch(
+            f'/api/recipes/{self.recipe.id}/',
+            {
+                'ingredients': ingredients,
+                'tags': list(self.recipe.tags.values_list('id', flat=True)),
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def current_ingredients(self):
+        return list(
+            self.recipe.recipeingredient_set.order_by('id').values_list(
+                'ingredient_id', 'amount'
+            )
+        )
+
+    def test_recipe_edit(self):
+        current = self.current_ingredients()
+        unused = Ingredient.objects.exclude(
+            id__in=[ingredient_id for ingredient_id, _ in current]
+        ).first()
+        # Первый ингредиент меняет количество, последний удаляется,
+        # добавляется новый.
+        (changed, changed_amount), *kept, (removed, removed_amount) = current
+        expected = {changed: 7, removed: -removed_amount, unused.id: 3}
+        before = stored()
+        self.edit(
+            [
+                {'id': changed, 'amount': changed_amount + 7},
+                *(
+                    {'id': ingredient_id, 'amount': amount}
+                    for ingredient_id, amount in kept
+                ),
+                {'id': unused.id, 'amount': 3},
+            ]
+        )
+        after = stored()
+        owners = set(
+            ShoppingCart.objects.filter(recipe=self.recipe).values_list(
+                'user_id', flat=True
+            )
+        )
+        self.assertTrue(owners)
+        for key in before.keys() | after.keys():
+            user_id, ingredient_id = key
+            with self.subTest(user_id=user_id, ingredient_id=ingredient_id):
+                self.assertEqual(
+                    after.get(key, 0) - before.get(key, 0),
+                    expected.get(ingredient_id, 0) if user_id in owners else 0,
+                )
+        self.assert_consistent()
+
+    def test_unchanged_edit(self):
+        """Правка без изменений не пишет в таблицу ингредиентов рецепта."""
+        before = stored()
+        table = RecipeIngredient._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            self.edit(
+                [
+                    {'id': ingredient_id, 'amount': amount}
+                    for ingredient_id, amount in self.current_ingredients()
+                ]
+            )
+        writes = [
+            query['sql']
+            for query in context.captured_queries
+            if table in query['sql']
+            and query['sql']
+            .lstrip()
+            .startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(writes, [])
+        self.assertEqual(stored(), before)
+
+    def test_recipe_delete(self):
+        response = self.author.delete(f'/api/recipes/{self.recipe.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_consistent()
+
+    def test_clear(self):
+        owner = ShoppingCart.objects.order_by('id').first().user
+        self.client.force_authenticate(owner)
+        response = self.client.delete('/api/recipes/shopping_cart/clear/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingListItem.objects.filter(user=owner).exists())
+        self.assert_consistent()
+
+
+class RebuildShoppingListsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=5, recipes=20, shopping_cart=4)
+
+    def rebuild(self, *args):
+        stdout = StringIO()
+        call_command('rebuild_shopping_lists', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_no_drift(self):
+        self.assertIn(
+            'Отсутствовало позиций: 0, с неверным количеством: 0, лишних: 0',
+            self.rebuild(),
+        )
+
+    def test_drift_reported_and_fixed(self):
+        items = ShoppingListItem.objects.order_by('id')
+        missing, wrong = items[:2]
+        missing.delete()
+        ShoppingListItem.objects.filter(id=wrong.id).update(amount=999999)
+        extra_ingredient = Ingredient.objects.exclude(
+            shopping_list_items__user=wrong.user
+        ).first()
+        ShoppingListItem.objects.create(
+            user=wrong.user, ingredient=extra_ingredient, amount=1
+        )
+        report = (
+            'Отсутствовало позиций: 1, с неверным количеством: 1, лишних: 1'
+        )
+        self.assertIn(report, self.rebuild('--dry-run'))
+        self.assertNotEqual(stored(), recomputed())
+        self.assertIn(report, self.rebuild())
+        self.assertEqual(stored(), recomputed())
@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.test import TestCase
+
+from api.tests.fixtures import seed
+from api.utils import Base52
+from recipes.models import Recipe
+
+
+class ShortLinkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=2, recipes=3)
+
+    def get(self, recipe_id):
+        return self.client.get(f'/rec/{Base52.to_base52(recipe_id)}/')
+
+    def test_redirect(self):
+        recipe = Recipe.objects.first()
+        response = self.get(recipe.id)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].endswith(f'/{recipe.id}'))
+
+    def test_malformed(self):
+        self.assertEqual(self.client.get('/rec/a-b/').status_code, 404)
+
+    def test_get_link(self):
+        recipe = Recipe.objects.first()
+        response = self.client.get(f'/api/recipes/{recipe.id}/get-link/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.json()['short-link'].endswith(
+                f'/rec/{Base52.to_base52(recipe.id)}'
+            )
+        )
+
+    def test_get_link_not_found(self):
+        for pk in ('0', '%C2%B2', '999999'):
+            with self.subTest(pk=pk):
+                response = self.client.get(f'/api/recipes/{pk}/get-link/')
+                self.assertEqual(response.status_code, 404)
+
+    def test_deleted_in_outer_transaction(self):
+        recipe = Recipe.objects.first()
+        self.assertEqual(self.get(recipe.id).status_code, 302)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Recipe.objects.get(id=recipe.id).delete()
+        self.assertEqual(self.get(recipe.id).status_code, 404)
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import DataImport, Ingredient
+
+
+class CatalogSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+
+    def names(self):
+        response = self.client.get('/api/ingredients/')
+        return [item['name'] for item in response.json()]
+
+    def test_rebuilt_on_change(self):
+        self.assertEqual(self.names(), ['соль'])
+        Ingredient.objects.create(name='перец', measurement_unit='г')
+        self.assertEqual(self.names(), ['перец', 'соль'])
+
+    def test_not_modified(self):
+        etag = self.client.get('/api/ingredients/')['ETag']
+        response = self.client.get(
+            '/api/ingredients/', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(CATALOG_VERSION_TIMEOUT=0)
+    def test_version_shared_through_database(self):
+        self.assertEqual(self.names(), ['соль'])
+        # Другой процесс меняет справочник без сигналов и без доступа
+        # к локальному кешу этого процесса.
+        Ingredient.objects.bulk_create(
+            [Ingredient(name='перец', measurement_unit='г')]
+        )
+        self.assertEqual(self.names(), ['соль'])
+        DataImport.objects.filter(source='ingredients').update(
+            version=F('version') + 1
+        )
+        self.assertEqual(self.names(), ['перец', 'соль'])
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import seed
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class SubscriptionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=5, recipes=30, subscriptions=0)
+        cls.user, *cls.authors = User.objects.order_by('id')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, **params):
+        response = self.client.get('/api/users/subscriptions/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_no_subscriptions(self):
+        self.assertEqual(self.get(), [])
+        self.assertEqual(self.get(recipes_limit=3), [])
+
+    def test_recipes_limit(self):
+        for author in self.authors:
+            Subscription.objects.create(follower=self.user, following=author)
+        for result in self.get(recipes_limit=2):
+            author = User.objects.get(id=result['id'])
+            expected = list(
+                author.recipes.order_by('-id').values_list('id', flat=True)
+            )
+            self.assertEqual(
+                [recipe['id'] for recipe in result['recipes']], expected[:2]
+            )
+            self.assertEqual(result['recipes_count'], len(expected))
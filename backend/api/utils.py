@@ -3,6 +3,9 @@ from string import ascii_letters
 
 class Base52:
     SYMBOLS = ascii_letters
+    DECODE_TABLE = {
+        symbol: index for index, symbol in enumerate(ascii_letters)
+    }
 
     @staticmethod
     def to_base52(num):
@@ -17,7 +20,24 @@ class Base52:
 
     @staticmethod
     def from_base52(base52):
+        """Декодирует строку, возвращая None для некорректных ссылок."""
+        if not base52:
+            return None
         num = 0
         for char in base52:
-            num = num * 52 + Base52.SYMBOLS.index(char)
+            value = Base52.DECODE_TABLE.get(char)
+            if value is None:
+                return None
+            num = num * 52 + value
         return num
+
+
+def parse_id(value):
+    """ID из адреса или None, если это не десятичное ASCII-число.
+
+    ``str.isdigit`` пропускает символы вроде ``²``, на которых
+    ``int`` падает с ``ValueError``.
+    """
+    if value.isascii() and value.isdecimal():
+        return int(value)
+    return None
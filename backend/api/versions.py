@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from backend.db import use_primary
+from recipes.models import DataImport
+
+VERSION_KEY = 'version:{}'
+# Версии справочников хранятся в базе: их меняет и отдельный процесс
+# ``load_ingredients``, который не видит локальный кеш веб-воркеров.
+STORED_VERSIONS = ('ingredients', 'tags')
+
+
+def get_stored_version(name):
+    """Версия справочника ``name`` из таблицы загрузок данных.
+
+    Прочитанное значение кешируется на ``CATALOG_VERSION_TIMEOUT``
+    секунд: при локальном кеше процесса это предел, за который
+    изменение справочника доходит до остальных воркеров.
+    """
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        with use_primary():
+            version = (
+                DataImport.objects.filter(source=name)
+                .values_list('version', flat=True)
+                .first()
+            ) or 0
+        cache.set(key, version, settings.CATALOG_VERSION_TIMEOUT)
+    return version
+
+
+def bump_stored_version(name):
+    if not DataImport.objects.filter(source=name).update(
+        version=F('version') + 1
+    ):
+        DataImport.objects.get_or_create(source=name, defaults={'version': 1})
+    key = VERSION_KEY.format(name)
+    # Второй сброс после фиксации убирает версию, которую другой поток
+    # мог прочитать и закешировать до коммита.
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def get_version(name):
+    """Текущая версия набора данных ``name``.
+
+    Версии хранятся в кеше Django, поэтому при общем кеше их видят
+    все процессы. Начальное значение берётся из времени, чтобы версия
+    не повторилась после вытеснения ключа из кеша. Версии справочников
+    из ``STORED_VERSIONS`` читаются из базы.
+    """
+    if name in STORED_VERSIONS:
+        return get_stored_version(name)
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    if name in STORED_VERSIONS:
+        return bump_stored_version(name)
+    key = VERSION_KEY.format(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
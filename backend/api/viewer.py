@@ -0,0 +1,68 @@
+from favorites.models import Favorite
+from shopping.models import ShoppingCart
+from users.models import Subscription
+
+
+class ViewerContext:
+    """Избранное, корзина и подписки текущего пользователя.
+
+    Хранит только отметки для уже загруженных ID: ``load`` одним
+    запросом ``IN`` на каждое отношение добирает отметки для объектов
+    страницы, после чего сериализаторы проверяют флаги по множествам.
+    Для объектов, не попавших в ``load``, отметка загружается
+    отдельным запросом при первом обращении.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._loaded = {'recipes': set(), 'authors': set()}
+        self.favorited = set()
+        self.in_shopping_cart = set()
+        self.followed = set()
+
+    def _missing(self, kind, ids):
+        loaded = self._loaded[kind]
+        missing = {pk for pk in ids if pk not in loaded}
+        loaded |= missing
+        return missing
+
+    def load(self, recipe_ids=(), author_ids=()):
+        if self.user.is_anonymous:
+            return
+        recipe_ids = self._missing('recipes', recipe_ids)
+        if recipe_ids:
+            self.favorited.update(
+                Favorite.objects.filter(
+                    user=self.user, recipe_id__in=recipe_ids
+                ).values_list('recipe_id', flat=True)
+            )
+            self.in_shopping_cart.update(
+                ShoppingCart.objects.filter(
+                    user=self.user, recipe_id__in=recipe_ids
+                ).values_list('recipe_id', flat=True)
+            )
+        author_ids = self._missing('authors', author_ids)
+        if author_ids:
+            self.followed.update(
+                Subscription.objects.filter(
+                    follower=self.user, following_id__in=author_ids
+                ).values_list('following_id', flat=True)
+            )
+
+    def add_followed(self, author_ids):
+        """Отмечает авторов, подписка на которых уже известна."""
+        author_ids = set(author_ids)
+        self._loaded['authors'] |= author_ids
+        self.followed |= author_ids
+
+    def is_favorited(self, recipe_id):
+        self.load(recipe_ids=(recipe_id,))
+        return recipe_id in self.favorited
+
+    def is_in_shopping_cart(self, recipe_id):
+        self.load(recipe_ids=(recipe_id,))
+        return recipe_id in self.in_shopping_cart
+
+    def is_subscribed(self, author_id):
+        self.load(author_ids=(author_id,))
+        return author_id in self.followed
@@ -1,35 +1,59 @@
-from io import StringIO
-
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.http import (Http404, HttpResponseNotModified,
+                         StreamingHttpResponse)
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserViewSet
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from api.caching import recipes_cache
+from api.exports import export_shopping_list, shopping_list_etag
 from api.filters import IngredientFilter, RecipeFilter
-from api.mixins import BaseRecipeAction
-from api.paginations import CustomPagination
+from api.images import clear_variants, schedule_variants
+from api.indexes import ingredient_index, recipe_ids
+from api.mixins import (AnonymousCacheMixin, BaseRecipeAction,
+                        BulkActionMixin, ConditionalGetMixin,
+                        CursorPaginationMixin, ViewerContextMixin)
+from api.paginations import (CustomCursorPagination, CustomPagination,
+                             UserCursorPagination)
 from api.permissions import IsAuthorOrReadOnly
+from api.relations import link, unlink
+from api.renderers import CSVRenderer, PlainTextRenderer
 from api.serializers import (AvatarSerializer, ExtendedCustomUserSerializer,
-                             IngredientSerializer, RecipeSerializer,
-                             TagSerializer)
-from api.utils import Base52
+                             IngredientSerializer, RecipeReadSerializer,
+                             RecipeSerializer, TagSerializer)
+from api.snapshots import ingredients_snapshot, tags_snapshot
+from api.utils import Base52, parse_id
 from backend.settings import HOST
 from favorites.models import Favorite
+from feed.models import FeedItem
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
-from shopping.models import ShoppingCart
+from shopping.models import ShoppingCart, ShoppingListItem
 from users.models import Subscription
 
 User = get_user_model()
 
+# Остальные поля пользователя в ``request.user`` могут быть устаревшими:
+# счётчики меняются запросами ``UPDATE`` в обход экземпляра.
+AVATAR_FIELDS = ('avatar', 'avatar_thumbnail', 'avatar_webp', 'updated_at')
+
 
-class UserViewSet(DjoserViewSet):
+class UserViewSet(
+    BulkActionMixin,
+    ViewerContextMixin,
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    DjoserViewSet,
+):
     pagination_class = CustomPagination
+    cursor_pagination_class = UserCursorPagination
+    viewer_author_field = 'id'
 
     @action(
         methods=('get',),
@@ -37,8 +61,14 @@ class UserViewSet(DjoserViewSet):
         permission_classes=[IsAuthenticated],
     )
     def me(self, request):
-        serializer = self.get_serializer(request.user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        user = request.user
+        return self.conditional_response(
+            lambda: Response(
+                self.get_serializer(user).data, status=status.HTTP_200_OK
+            ),
+            self.make_etag(user.id, user.updated_at),
+            user.updated_at,
+        )
 
     @action(
         methods=('put', 'delete'),
@@ -53,7 +83,9 @@ class UserViewSet(DjoserViewSet):
             serializer = AvatarSerializer(data=request.data)
             if serializer.is_valid():
                 user.avatar = serializer.validated_data['avatar']
-                user.save()
+                clear_variants(user, 'avatar')
+                user.save(update_fields=AVATAR_FIELDS)
+                schedule_variants(user, 'avatar')
                 return Response(
                     {'avatar': user.avatar.url}, status=status.HTTP_200_OK
                 )
@@ -62,7 +94,8 @@ class UserViewSet(DjoserViewSet):
             )
 
         user.avatar = None
-        user.save()
+        clear_variants(user, 'avatar')
+        user.save(update_fields=AVATAR_FIELDS)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -75,15 +108,27 @@ class UserViewSet(DjoserViewSet):
     def subscriptions(self, request):
         user = request.user
 
-        subscriptions = Subscription.objects.filter(follower=user).values_list(
-            'following', flat=True
-        )
-        following_users = User.objects.filter(id__in=subscriptions)
+        following_users = User.objects.filter(
+            followers__follower=user
+        ).order_by('id')
 
         paginator = self.paginator
         result_page = paginator.paginate_queryset(following_users, request)
+        self.get_viewer().add_followed(author.id for author in result_page)
 
-        serializer = self.get_serializer(result_page, many=True)
+        recipes_limit = request.query_params.get('recipes_limit')
+        author_recipes = {author.id: [] for author in result_page}
+        for recipe in Recipe.objects.first_per_author(
+            list(author_recipes),
+            int(recipes_limit) if recipes_limit else None,
+        ):
+            author_recipes[recipe.author_id].append(recipe)
+
+        context = self.get_serializer_context()
+        context['author_recipes'] = author_recipes
+        serializer = self.get_serializer(
+            result_page, many=True, context=context
+        )
         return paginator.get_paginated_response(serializer.data)
 
     @action(
@@ -95,36 +140,70 @@ class UserViewSet(DjoserViewSet):
     )
     def subscribe(self, request, id):
         user = request.user
-        author = self.get_object()
-        subcription = Subscription.objects.filter(
-            follower=user, following=author
-        ).first()
 
         if request.method == 'POST':
+            author = self.get_object()
             if user == author:
                 return Response(
                     {'detail': 'Нельзя подписаться на самого себя'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if subcription:
-                return Response(
-                    {'detail': 'Вы уже подписаны на этого автора'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            Subscription.objects.create(follower=user, following=author)
+            with transaction.atomic():
+                if not link(
+                    Subscription,
+                    'follower',
+                    user.id,
+                    'following',
+                    (author.id,),
+                ):
+                    return Response(
+                        {'detail': 'Вы уже подписаны на этого автора'},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                Subscription.objects.added(user, (author.id,))
+                FeedItem.objects.backfill(user, (author.id,))
             serializer = self.get_serializer(author)
             return Response(serializer.data, status=201)
 
-        if subcription:
-            subcription.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        author_id = parse_id(id)
+        author_ids = () if author_id is None else (author_id,)
+        with transaction.atomic():
+            if unlink(
+                Subscription, 'follower', user.id, 'following', author_ids
+            ):
+                Subscription.objects.removed(user, author_ids)
+                FeedItem.objects.prune(user, author_ids)
+                return Response(status=status.HTTP_204_NO_CONTENT)
+
+        self.get_object()
         return Response(
             {'detail': 'Вы не подписаны на этого автора'},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @action(
+        methods=('post', 'delete'),
+        detail=False,
+        permission_classes=[IsAuthenticated],
+        url_path='subscribe',
+    )
+    def subscribe_bulk(self, request):
+        user = request.user
+        with transaction.atomic():
+            results, changed = self.bulk_mutate(
+                request,
+                Subscription,
+                'follower',
+                'following',
+                rejected=(user.id,),
+            )
+            if request.method == 'POST' and changed:
+                FeedItem.objects.backfill(user, changed)
+            elif changed:
+                FeedItem.objects.prune(user, changed)
+        return self.bulk_response(results)
+
 
 class TagViewSet(
     mixins.ListModelMixin,
@@ -135,6 +214,9 @@ class TagViewSet(
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return tags_snapshot.response(request)
+
 
 class IngredientViewSet(
     mixins.ListModelMixin,
@@ -147,15 +229,56 @@ class IngredientViewSet(
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return ingredients_snapshot.response(request)
+
 
-class RecipeViewSet(BaseRecipeAction, viewsets.ModelViewSet):
+class RecipeViewSet(
+    AnonymousCacheMixin,
+    ViewerContextMixin,
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    BaseRecipeAction,
+    viewsets.ModelViewSet,
+):
     queryset = Recipe.objects.all()
+    anonymous_cache = recipes_cache
+    last_modified_fields = ('updated_at', 'author__updated_at')
+    viewer_recipe_field = 'id'
+    viewer_author_field = 'author_id'
     serializer_class = RecipeSerializer
     pagination_class = CustomPagination
+    cursor_pagination_class = CustomCursorPagination
     permission_classes = (IsAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def get_serializer_class(self):
+        if (
+            self.action in ('list', 'retrieve', 'feed')
+            and self.request.method == 'GET'
+        ):
+            return RecipeReadSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve', 'feed'):
+            return queryset
+
+        return queryset.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+
     @action(
         detail=True,
         methods=('post', 'delete'),
@@ -171,6 +294,15 @@ class RecipeViewSet(BaseRecipeAction, viewsets.ModelViewSet):
             'Рецепт не найден в избранном',
         )
 
+    @action(
+        detail=False,
+        methods=('post', 'delete'),
+        url_path='favorite',
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_bulk(self, request):
+        return self.handle_bulk_action(request, Favorite)
+
     @action(
         detail=True,
         methods=('post', 'delete'),
@@ -186,45 +318,78 @@ class RecipeViewSet(BaseRecipeAction, viewsets.ModelViewSet):
             'Рецепт не найден в списке покупок',
         )
 
+    @action(
+        detail=False,
+        methods=('post', 'delete'),
+        url_path='shopping_cart',
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_bulk(self, request):
+        return self.handle_bulk_action(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=('delete',),
+        url_path='shopping_cart/clear',
+        permission_classes=(IsAuthenticated,),
+    )
+    def clear_shopping_cart(self, request):
+        return self.handle_clear(request, ShoppingCart)
+
     @action(
         detail=False,
         methods=('get',),
         url_path='download_shopping_cart',
         permission_classes=(IsAuthenticated,),
+        renderer_classes=(PlainTextRenderer, CSVRenderer, JSONRenderer),
     )
     def download_shopping_cart(self, request):
         ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__shopping_cart__user=request.user
-            )
+            ShoppingListItem.objects.filter(user=request.user)
             .values(
                 'ingredient__name',
                 'ingredient__measurement_unit',
+                total_amount=F('amount'),
             )
-            .annotate(total_amount=models.Sum('amount'))
+            .order_by('ingredient__name', 'ingredient__measurement_unit')
         )
-        output = StringIO()
-        output.write('Список покупок:\n')
-        for ingredient in ingredients:
-            output.write(
-                f'{ingredient["ingredient__name"]} - '
-                f'{ingredient["total_amount"]} '
-                f'{ingredient["ingredient__measurement_unit"]}\n'
+        renderer = request.accepted_renderer
+        etag = shopping_list_etag(ingredients, renderer.format)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = StreamingHttpResponse(
+                export_shopping_list(ingredients, renderer.format),
+                content_type=f'{renderer.media_type}; charset=utf-8',
             )
-        content = output.getvalue()
-        response = HttpResponse(content, content_type='text/plain')
-        response['Content-Disposition'] = (
-            'attachment; filename="shopping_cart.txt"'
-        )
+            response['Content-Disposition'] = (
+                f'attachment; filename="shopping_cart.{renderer.format}"'
+            )
+        response['ETag'] = etag
         return response
 
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path='feed',
+        permission_classes=(IsAuthenticated,),
+        pagination_class=CustomCursorPagination,
+    )
+    def feed(self, request):
+        queryset = self.get_queryset().filter(feed_items__user=request.user)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=True,
         methods=['GET'],
         url_path='get-link',
     )
     def get_link(self, request, pk):
-        get_object_or_404(Recipe, id=pk)
+        recipe_id = parse_id(pk)
+        if recipe_id is None or recipe_id not in recipe_ids:
+            raise Http404
         short_pk = Base52.to_base52(pk)
         return Response(
             {'short-link': f'{HOST}/rec/{short_pk}'},
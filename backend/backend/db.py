@@ -0,0 +1,105 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_KEY = 'db:primary:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+API_PREFIX = '/api/'
+
+# Реплика, выбранная для текущего запроса; ``None`` означает основную
+# базу. Потоки пула и код вне запроса видят значение по умолчанию.
+replica_alias = ContextVar('replica_alias', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Читает внутри блока только с основной базы."""
+    token = replica_alias.set(None)
+    try:
+        yield
+    finally:
+        replica_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Направляет чтение безопасных запросов API на реплики.
+
+    Запись, миграции и чтение вне ``ReplicaMiddleware`` идут в основную
+    базу. Внутри транзакции чтение тоже остаётся на основной базе,
+    чтобы видеть только что записанные строки.
+    """
+
+    # Только что выданный токен или сессия могут ещё не дойти
+    # до реплики.
+    primary_models = ('authtoken.token', 'sessions.session')
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias.get()
+        if (
+            alias is None
+            or model._meta.label_lower in self.primary_models
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def sticky_key(request):
+    """Ключ окна чтения с основной базы после записи.
+
+    Пользователь API определяется заголовком ``Authorization``;
+    анонимные запросы без него к основной базе не привязываются.
+    """
+    authorization = request.headers.get('Authorization')
+    if not authorization:
+        return None
+    return STICKY_KEY.format(
+        hashlib.sha256(authorization.encode()).hexdigest()
+    )
+
+
+class ReplicaMiddleware:
+    """Выбирает реплику для безопасных запросов к API.
+
+    После изменяющего запроса пользователь на
+    ``REPLICA_STICKY_SECONDS`` секунд читает с основной базы, чтобы
+    не увидеть устаревшие избранное, корзину или подписки из-за
+    отставания реплики. Админка и остальные адреса вне ``/api/``
+    всегда читают с основной базы: их сессии не попадают в окно
+    по заголовку ``Authorization``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or not request.path_info.startswith(API_PREFIX):
+            return self.get_response(request)
+        key = sticky_key(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if key is not None:
+                cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+            return response
+        if key is not None and cache.get(key):
+            return self.get_response(request)
+        token = replica_alias.set(random.choice(replicas))
+        try:
+            return self.get_response(request)
+        finally:
+            replica_alias.reset(token)
@@ -0,0 +1,268 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+FAMILIES = {
+    'foodgram_http_requests_total': (
+        'counter',
+        'HTTP requests by view, method and status code.',
+    ),
+    'foodgram_http_request_duration_seconds': (
+        'histogram',
+        'Time spent handling a request.',
+    ),
+    'foodgram_http_response_size_bytes': (
+        'histogram',
+        'Size of non-streaming response bodies.',
+    ),
+    'foodgram_db_queries_per_request': (
+        'histogram',
+        'SQL queries executed while handling a request.',
+    ),
+    'foodgram_db_duration_seconds_total': (
+        'counter',
+        'Time spent in SQL queries.',
+    ),
+    'foodgram_cache_requests_total': (
+        'counter',
+        'Application cache lookups by cache and result.',
+    ),
+}
+
+
+def format_value(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            key,
+            str(value)
+            .replace('\\', '\\\\')
+            .replace('"', '\\"')
+            .replace('\n', '\\n'),
+        )
+        for key, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+class Registry:
+    """Счётчики и гистограммы метрик в памяти процесса.
+
+    Гистограммы хранятся как накопительные счётчики корзин, поэтому
+    значения разных процессов складываются простым суммированием.
+    Если задан ``directory``, процесс периодически сбрасывает свои
+    значения в файл ``<pid>.json``, а выдача объединяет файлы всех
+    воркеров gunicorn.
+    """
+
+    def __init__(self, directory=None, flush_interval=5):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._lock = Lock()
+        self._values = defaultdict(float)
+        self._collectors = []
+        self._flushed_at = 0
+
+    def register_collector(self, collector):
+        """Добавляет функцию, возвращающую текущие значения счётчиков.
+
+        Функция должна отдавать тройки ``(имя, метки, значение)``
+        с накопленными в процессе значениями.
+        """
+        self._collectors.append(collector)
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            self._values[name, tuple(labels)] += value
+
+    def observe(self, name, labels, value, buckets):
+        labels = tuple(labels)
+        with self._lock:
+            for bound in buckets:
+                if value <= bound:
+                    self._values[
+                        f'{name}_bucket', labels + (('le', bound),)
+                    ] += 1
+            self._values[f'{name}_bucket', labels + (('le', '+Inf'),)] += 1
+            self._values[f'{name}_sum', labels] += value
+            self._values[f'{name}_count', labels] += 1
+
+    def record_request(
+        self,
+        view,
+        method,
+        status,
+        duration,
+        response_size,
+        queries,
+        db_duration,
+    ):
+        labels = (('view', view),)
+        self.inc(
+            'foodgram_http_requests_total',
+            labels + (('method', method), ('status', status)),
+        )
+        self.observe(
+            'foodgram_http_request_duration_seconds',
+            labels,
+            duration,
+            LATENCY_BUCKETS,
+        )
+        if response_size is not None:
+            self.observe(
+                'foodgram_http_response_size_bytes',
+                labels,
+                response_size,
+                SIZE_BUCKETS,
+            )
+        self.observe(
+            'foodgram_db_queries_per_request', labels, queries, QUERY_BUCKETS
+        )
+        self.inc('foodgram_db_duration_seconds_total', labels, db_duration)
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                values[name, tuple(labels)] = value
+        return values
+
+    def flush(self):
+        if self.directory is None:
+            return
+        self._flushed_at = time.monotonic()
+        rows = [
+            [name, list(labels), value]
+            for (name, labels), value in self.snapshot().items()
+        ]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f'{os.getpid()}.json'
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(rows))
+        os.replace(temporary, path)
+
+    def collect(self):
+        if self.directory is None:
+            return self.snapshot()
+        self.flush()
+        values = defaultdict(float)
+        for path in self.directory.glob('*.json'):
+            try:
+                rows = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in rows:
+                values[name, tuple(map(tuple, labels))] += value
+        return values
+
+    @staticmethod
+    def sort_key(item):
+        (name, labels), _ = item
+        bound = dict(labels).get('le')
+        return (
+            tuple((key, str(value)) for key, value in labels if key != 'le'),
+            name,
+            float(bound) if bound is not None else 0,
+        )
+
+    def render(self):
+        families = defaultdict(list)
+        for (name, labels), value in sorted(
+            self.collect().items(), key=self.sort_key
+        ):
+            family = next(
+                (
+                    family
+                    for family in FAMILIES
+                    if name == family or name.startswith(f'{family}_')
+                ),
+                name,
+            )
+            families[family].append(
+                f'{name}{format_labels(labels)} {format_value(value)}'
+            )
+        lines = []
+        for family, samples in families.items():
+            kind, description = FAMILIES.get(family, ('untyped', ''))
+            lines.append(f'# HELP {family} {description}')
+            lines.append(f'# TYPE {family} {kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+
+
+def view_label(view_func, method):
+    """Имя представления для меток: ``RecipeViewSet.list`` и т.п."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{cls.__name__}.{action}'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Записывает время ответа, размер и SQL-запросы каждого запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        registry.record_request(
+            view=getattr(request, 'metrics_view', 'unmatched'),
+            method=request.method,
+            status=response.status_code,
+            duration=time.perf_counter() - start,
+            response_size=(
+                None if response.streaming else len(response.content)
+            ),
+            queries=queries.count,
+            db_duration=queries.duration,
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_label(view_func, request.method)
@@ -1,13 +1,36 @@
-from django.shortcuts import get_object_or_404, redirect
-from rest_framework.decorators import api_view
+import hmac
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect
+from django.views.decorators.http import require_GET
+
+from api.indexes import recipe_ids
 from api.utils import Base52
+from backend.metrics import registry
 from backend.settings import HOST
-from recipes.models import Recipe
 
 
-@api_view(['GET'])
+@require_GET
 def get_recipe_by_short_link(request, link):
     recipe_id = Base52.from_base52(link)
-    get_object_or_404(Recipe, id=recipe_id)
+    if recipe_id is None or recipe_id not in recipe_ids:
+        raise Http404
     return redirect(f'{HOST}/recipes/{recipe_id}')
+
+
+@require_GET
+def metrics(request):
+    """Метрики в текстовом формате Prometheus.
+
+    Доступны только с заголовком ``Authorization: Bearer <METRICS_TOKEN>``;
+    без заданного токена адрес не существует.
+    """
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
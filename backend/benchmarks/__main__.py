@@ -0,0 +1,26 @@
+"""Бенчмарк эндпоинтов API с контролем числа SQL-запросов.
+
+Запуск из каталога ``backend``::
+
+    python -m benchmarks --repeat 20 --report report.json
+
+Падает с ненулевым кодом, если эндпоинт превысил бюджет запросов
+из ``budgets.json`` или делает больше запросов, чем в
+``baseline.json``. Замедление относительно ``baseline.json``
+проверяется только с ``--compare-latency``, когда базовый прогон
+снят на той же машине::
+
+    python -m benchmarks --update-baseline
+    python -m benchmarks --compare-latency
+"""
+import os
+import sys
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from benchmarks.runner import main  # noqa: E402
+
+sys.exit(main())
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+PASSWORD = 'benchmark-password'
+
+
+@dataclass
+class Dataset:
+    reader: User
+    token: str
+    author: User
+    recipe: Recipe
+    tag: Tag
+    ingredients: list
+
+
+def build_dataset(users=50, recipes=6500, seed=1):
+    """Создаёт схему и детерминированный набор данных для бенчмарков.
+
+    Данные генерирует команда ``seed_data``, она же заполняет
+    счётчики, списки покупок и ленты.
+    """
+    call_command('migrate', verbosity=0)
+    call_command(
+        'seed_data',
+        users=users,
+        recipes=recipes,
+        seed=seed,
+        password=PASSWORD,
+        stdout=StringIO(),
+    )
+    reader = User.objects.filter(recipes_count__gt=0).order_by('id').first()
+    author = (
+        User.objects.filter(recipes__isnull=False)
+        .exclude(followers__follower=reader)
+        .exclude(id=reader.id)
+        .distinct()
+        .first()
+    )
+    return Dataset(
+        reader=reader,
+        token=Token.objects.create(user=reader).key,
+        author=author,
+        recipe=Recipe.objects.filter(author=author)
+        .exclude(favorites__user=reader)
+        .exclude(shopping_cart__user=reader)
+        .first(),
+        tag=Tag.objects.order_by('id').first(),
+        ingredients=list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)[:5]
+        ),
+    )
@@ -0,0 +1,297 @@
+import argparse
+import json
+import math
+import platform
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.filters import IngredientFilter
+from api.indexes import ingredient_index
+from api.renderers import ORJSONRenderer
+from api.serializers import (IngredientSerializer, RecipeReadSerializer,
+                             RecipeSerializer)
+from api.views import RecipeViewSet
+from benchmarks.dataset import build_dataset
+from benchmarks.scenarios import INGREDIENT_QUERIES, build_scenarios
+from recipes.models import Ingredient
+
+HERE = Path(__file__).resolve().parent
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def send(client, scenario, headers):
+    response = getattr(client, scenario.method)(
+        scenario.path, scenario.data, format='json', **headers
+    )
+    if response.streaming:
+        # Потоковый ответ читает базу при итерации, её тоже замеряем.
+        b''.join(response.streaming_content)
+    return response
+
+
+def measure(client, scenario, repeat):
+    headers = scenario.prepare(client, scenario) if scenario.prepare else {}
+    timings = []
+    queries = []
+    status = None
+    for run in range(repeat + 1):
+        if scenario.cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = send(client, scenario, headers)
+            elapsed = time.perf_counter() - start
+        # Запрос отката очищает журнал запросов, поэтому считаем до него.
+        if run:
+            timings.append(elapsed * 1000)
+            queries.append(len(context.captured_queries))
+        status = response.status_code
+        if scenario.undo and status == scenario.status:
+            scenario.undo(client, scenario, response)
+    return {
+        'method': scenario.method.upper(),
+        'path': scenario.path,
+        'status': status,
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'queries': max(queries),
+    }
+
+
+def compare_serializers(dataset, repeat, size=100):
+    """Скорость полного и облегчённого сериализатора рецептов."""
+    request = Request(APIRequestFactory().get('/api/recipes/'))
+    request.user = dataset.reader
+    view = RecipeViewSet(
+        request=request, action='list', format_kwarg=None, kwargs={}
+    )
+    recipes = list(view.get_queryset()[:size])
+    view.preload_viewer(recipes)
+    context = view.get_serializer_context()
+    results = {}
+    for serializer_class, renderer_class in (
+        (RecipeSerializer, JSONRenderer),
+        (RecipeReadSerializer, ORJSONRenderer),
+    ):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            renderer_class().render(
+                serializer_class(recipes, many=True, context=context).data
+            )
+        elapsed = time.perf_counter() - start
+        results[serializer_class.__name__] = {
+            'renderer': renderer_class.__name__,
+            'recipes_per_second': round(size * repeat / elapsed),
+        }
+    return results
+
+
+def compare_ingredient_search(repeat):
+    """Скорость поиска ингредиентов по индексу и через ORM."""
+    ingredient_index.search('')
+    searches = {
+        'IngredientIndex': ingredient_index.search,
+        'IngredientFilter': lambda query: IngredientSerializer(
+            IngredientFilter(
+                {'name': query}, queryset=Ingredient.objects.all()
+            ).qs,
+            many=True,
+        ).data,
+    }
+    results = {}
+    for name, search in searches.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for query in INGREDIENT_QUERIES:
+                search(query)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            'lookups_per_second': round(
+                len(INGREDIENT_QUERIES) * repeat / elapsed
+            ),
+        }
+    return results
+
+
+def check_budgets(endpoints, budgets):
+    failures = []
+    for name, result in endpoints.items():
+        budget = budgets.get(name)
+        if budget is None:
+            failures.append(f'{name}: no query budget')
+        elif result['queries'] > budget:
+            failures.append(
+                f'{name}: {result["queries"]} queries, budget {budget}'
+            )
+    return failures
+
+
+def check_baseline(endpoints, baseline, threshold, min_delta_ms, latency):
+    """Сравнивает прогон с сохранённым.
+
+    Рост числа запросов — всегда ошибка. Время ответа зависит от
+    машины, поэтому сравнивается только с ``latency``: базовый прогон
+    должен быть снят на той же машине.
+    """
+    failures = []
+    for name, result in endpoints.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        limit = previous['p50_ms'] * (1 + threshold)
+        if (
+            latency
+            and result['p50_ms'] > limit
+            and result['p50_ms'] - previous['p50_ms'] > min_delta_ms
+        ):
+            failures.append(
+                f'{name}: p50 {result["p50_ms"]} ms, '
+                f'baseline {previous["p50_ms"]} ms'
+            )
+        if result['queries'] > previous['queries']:
+            failures.append(
+                f'{name}: {result["queries"]} queries, '
+                f'baseline {previous["queries"]}'
+            )
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark API endpoints against query budgets '
+        'and a stored baseline',
+    )
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--recipes', type=int, default=6500)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument(
+        '--repeat', type=int, default=20, help='Measured runs per endpoint'
+    )
+    parser.add_argument(
+        '--only', default='', help='Run endpoints whose name contains this'
+    )
+    parser.add_argument(
+        '--report', type=Path, help='Write the JSON report to this file'
+    )
+    parser.add_argument(
+        '--budgets', type=Path, default=HERE / 'budgets.json'
+    )
+    parser.add_argument(
+        '--baseline', type=Path, default=HERE / 'baseline.json'
+    )
+    parser.add_argument(
+        '--compare-latency',
+        action='store_true',
+        help='Also fail on p50 slowdowns against the baseline; '
+        'use only with a baseline recorded on the same machine',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.5,
+        help='Allowed relative p50 slowdown against the baseline',
+    )
+    parser.add_argument(
+        '--min-delta-ms',
+        type=float,
+        default=1.0,
+        help='Ignore slowdowns smaller than this many milliseconds',
+    )
+    parser.add_argument(
+        '--update-baseline',
+        action='store_true',
+        help='Store this run as the new baseline',
+    )
+    parser.add_argument(
+        '--update-budgets',
+        action='store_true',
+        help='Set query budgets to the counts measured in this run',
+    )
+    return parser.parse_args()
+
+
+def main():
+    options = parse_args()
+    setup_test_environment()
+    dataset = build_dataset(options.users, options.recipes, options.seed)
+    clients = {False: APIClient(), True: APIClient()}
+    clients[False].credentials(HTTP_AUTHORIZATION=f'Token {dataset.token}')
+
+    endpoints = {}
+    failures = []
+    for scenario in build_scenarios(dataset):
+        if options.only not in scenario.name:
+            continue
+        result = measure(
+            clients[scenario.anonymous], scenario, options.repeat
+        )
+        endpoints[scenario.name] = result
+        if result['status'] != scenario.status:
+            failures.append(f'{scenario.name}: status {result["status"]}')
+        print(
+            f'{scenario.name:<60} {result["status"]:>3} '
+            f'p50 {result["p50_ms"]:>8.2f} ms  '
+            f'p95 {result["p95_ms"]:>8.2f} ms  '
+            f'{result["queries"]:>3} queries'
+        )
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'users': options.users,
+            'recipes': options.recipes,
+            'repeat': options.repeat,
+        },
+        'endpoints': endpoints,
+        'serializers': compare_serializers(dataset, options.repeat),
+        'ingredient_search': compare_ingredient_search(options.repeat),
+    }
+    for name, result in report['serializers'].items():
+        print(f'{name:<60} {result["recipes_per_second"]:>8} recipes/s')
+    for name, result in report['ingredient_search'].items():
+        print(f'{name:<60} {result["lookups_per_second"]:>8} lookups/s')
+
+    if options.report:
+        options.report.write_text(json.dumps(report, indent=2) + '\n')
+    if options.update_baseline:
+        options.baseline.write_text(json.dumps(report, indent=2) + '\n')
+    if options.update_budgets:
+        budgets = {
+            name: result['queries'] for name, result in endpoints.items()
+        }
+        options.budgets.write_text(
+            json.dumps(budgets, indent=2, ensure_ascii=False) + '\n'
+        )
+
+    if options.budgets.exists():
+        failures += check_budgets(
+            endpoints, json.loads(options.budgets.read_text())
+        )
+    if options.baseline.exists() and not options.update_baseline:
+        failures += check_baseline(
+            endpoints,
+            json.loads(options.baseline.read_text())['endpoints'],
+            options.threshold,
+            options.min_delta_ms,
+            options.compare_latency,
+        )
+    for failure in failures:
+        print(f'FAIL {failure}', file=sys.stderr)
+    return 1 if failures else 0
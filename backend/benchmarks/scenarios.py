@@ -0,0 +1,234 @@
+from base64 import b64encode
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Callable, Optional
+from urllib.parse import urlencode
+
+from api.utils import Base52
+from benchmarks.dataset import PASSWORD
+from recipes.models import Recipe
+
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=='
+)
+CURSOR_DEPTHS = (1, 100, 1000)
+INGREDIENT_QUERIES = ('м', 'мас', 'масло', 'сах', 'соль', 'я')
+PAGE_SIZE = 6
+
+
+@dataclass
+class Scenario:
+    """Один замеряемый запрос к API.
+
+    ``undo`` вызывается после каждого замера и возвращает данные
+    в исходное состояние, ``prepare`` один раз перед замерами
+    возвращает дополнительные заголовки запроса.
+    """
+
+    name: str
+    path: str
+    method: str = 'get'
+    data: Optional[dict] = None
+    status: int = 200
+    anonymous: bool = False
+    cold: bool = False
+    undo: Optional[Callable] = None
+    prepare: Optional[Callable] = None
+
+
+def delete_same(client, scenario, response):
+    client.delete(scenario.path, scenario.data, format='json')
+
+
+def delete_created_recipe(client, scenario, response):
+    client.delete(f'/api/recipes/{response.json()["id"]}/')
+
+
+def etag_of(client, scenario):
+    return {'HTTP_IF_NONE_MATCH': client.get(scenario.path)['ETag']}
+
+
+def cursor(position):
+    return b64encode(urlencode({'p': position}).encode()).decode()
+
+
+def recipe_filter_scenarios(dataset):
+    """Список рецептов со всеми сочетаниями фильтров ``RecipeFilter``."""
+    filters = {
+        'tags': ('tags', dataset.tag.slug),
+        'author': ('author', dataset.author.id),
+        'is_favorited': ('is_favorited', 1),
+        'is_in_shopping_cart': ('is_in_shopping_cart', 1),
+        'search': ('search', 'суп'),
+    }
+    for size in range(1, len(filters) + 1):
+        for names in combinations(filters, size):
+            query = urlencode([filters[name] for name in names])
+            yield Scenario(
+                f'recipes.list[{"+".join(names)}]', f'/api/recipes/?{query}'
+            )
+
+
+def pagination_scenarios():
+    recipe_ids = Recipe.objects.order_by('-id').values_list('id', flat=True)
+    total = recipe_ids.count()
+    for depth in CURSOR_DEPTHS:
+        offset = (depth - 1) * PAGE_SIZE
+        if offset >= total:
+            continue
+        yield Scenario(
+            f'recipes.list[offset,page={depth}]',
+            f'/api/recipes/?{urlencode({"page": depth, "limit": PAGE_SIZE})}',
+        )
+        position = recipe_ids[offset - 1] if offset else None
+        query = {'pagination': 'cursor', 'limit': PAGE_SIZE}
+        if position is not None:
+            query['cursor'] = cursor(position)
+        yield Scenario(
+            f'recipes.list[cursor,page={depth}]',
+            f'/api/recipes/?{urlencode(query)}',
+        )
+
+
+def build_scenarios(dataset):
+    recipe = dataset.recipe
+    author = dataset.author
+    recipe_body = {
+        'ingredients': [
+            {'id': ingredient_id, 'amount': 10 * number}
+            for number, ingredient_id in enumerate(dataset.ingredients, 1)
+        ],
+        'tags': [dataset.tag.id],
+        'image': PNG,
+        'name': 'Бенчмарк',
+        'text': 'Рецепт для бенчмарка',
+        'cooking_time': 15,
+    }
+    own_recipe = Recipe.objects.filter(author=dataset.reader).first()
+    return [
+        Scenario('tags.list', '/api/tags/', anonymous=True),
+        Scenario('tags.detail', f'/api/tags/{dataset.tag.id}/'),
+        Scenario('ingredients.list', '/api/ingredients/', anonymous=True),
+        Scenario('ingredients.search', '/api/ingredients/?name=мас'),
+        Scenario(
+            'ingredients.detail',
+            f'/api/ingredients/{dataset.ingredients[0]}/',
+        ),
+        Scenario('users.list', '/api/users/'),
+        Scenario('users.detail', f'/api/users/{author.id}/'),
+        Scenario('users.me', '/api/users/me/'),
+        Scenario('users.subscriptions', '/api/users/subscriptions/'),
+        Scenario(
+            'users.subscriptions[recipes_limit=3]',
+            '/api/users/subscriptions/?recipes_limit=3',
+        ),
+        Scenario(
+            'users.subscribe',
+            f'/api/users/{author.id}/subscribe/',
+            method='post',
+            status=201,
+            undo=delete_same,
+        ),
+        Scenario(
+            'users.subscribe[bulk]',
+            '/api/users/subscribe/',
+            method='post',
+            data={'ids': [author.id]},
+            undo=delete_same,
+        ),
+        Scenario(
+            'auth.token.login',
+            '/api/auth/token/login/',
+            method='post',
+            data={
+                'email': dataset.reader.email,
+                'password': PASSWORD,
+            },
+            anonymous=True,
+        ),
+        Scenario('recipes.list[anonymous]', '/api/recipes/', anonymous=True),
+        Scenario(
+            'recipes.list[anonymous,uncached]',
+            '/api/recipes/',
+            anonymous=True,
+            cold=True,
+        ),
+        Scenario('recipes.list', '/api/recipes/'),
+        *recipe_filter_scenarios(dataset),
+        *pagination_scenarios(),
+        Scenario(
+            'recipes.detail[anonymous,uncached]',
+            f'/api/recipes/{recipe.id}/',
+            anonymous=True,
+            cold=True,
+        ),
+        Scenario('recipes.detail', f'/api/recipes/{recipe.id}/'),
+        Scenario(
+            'recipes.detail[if-none-match]',
+            f'/api/recipes/{recipe.id}/',
+            status=304,
+            prepare=etag_of,
+        ),
+        Scenario('recipes.feed', '/api/recipes/feed/'),
+        Scenario('recipes.get_link', f'/api/recipes/{recipe.id}/get-link/'),
+        Scenario(
+            'recipes.short_link',
+            f'/rec/{Base52.to_base52(recipe.id)}/',
+            status=302,
+            anonymous=True,
+        ),
+        Scenario(
+            'recipes.create',
+            '/api/recipes/',
+            method='post',
+            data=recipe_body,
+            status=201,
+            undo=delete_created_recipe,
+        ),
+        Scenario(
+            'recipes.update',
+            f'/api/recipes/{own_recipe.id}/',
+            method='patch',
+            data={
+                key: value
+                for key, value in recipe_body.items()
+                if key != 'image'
+            },
+        ),
+        Scenario(
+            'recipes.favorite',
+            f'/api/recipes/{recipe.id}/favorite/',
+            method='post',
+            status=201,
+            undo=delete_same,
+        ),
+        Scenario(
+            'recipes.favorite[bulk]',
+            '/api/recipes/favorite/',
+            method='post',
+            data={'ids': [recipe.id]},
+            undo=delete_same,
+        ),
+        Scenario(
+            'recipes.shopping_cart',
+            f'/api/recipes/{recipe.id}/shopping_cart/',
+            method='post',
+            status=201,
+            undo=delete_same,
+        ),
+        Scenario(
+            'recipes.shopping_cart[bulk]',
+            '/api/recipes/shopping_cart/',
+            method='post',
+            data={'ids': [recipe.id]},
+            undo=delete_same,
+        ),
+        *(
+            Scenario(
+                f'recipes.download_shopping_cart[{file_format}]',
+                f'/api/recipes/download_shopping_cart/?format={file_format}',
+            )
+            for file_format in ('txt', 'csv', 'json')
+        ),
+    ]
@@ -0,0 +1,40 @@
+"""Настройки для прогона бенчмарков на SQLite без внешних сервисов."""
+import os
+import tempfile
+
+os.environ.setdefault('SECRET_KEY', 'benchmarks')
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver')
+os.environ.setdefault('HOST', 'http://testserver')
+
+from backend.settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('BENCHMARK_DB', ':memory:'),
+        # ``manage.py test`` с этими настройками создаёт базу в файле:
+        # SQLite в памяти блокирует таблицы между потоками, и тесты
+        # параллельных запросов иначе пропускаются.
+        'TEST': {
+            'NAME': os.path.join(
+                tempfile.gettempdir(), 'foodgram-test.sqlite3'
+            ),
+        },
+    }
+}
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+PASSWORD_HASHERS = ('django.contrib.auth.hashers.MD5PasswordHasher',)
+
+MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'foodgram-benchmarks')
+
+IMAGE_VARIANTS_SYNC = True
+METRICS_DIR = ''
@@ -1,9 +1,24 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import F
+
+from recipes.models import Recipe
 
 User = get_user_model()
 
 
+class FavoriteQuerySet(models.QuerySet):
+    def added(self, user, recipe_ids):
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            favorites_count=F('favorites_count') + 1
+        )
+
+    def removed(self, user, recipe_ids):
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            favorites_count=F('favorites_count') - 1
+        )
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -12,12 +27,14 @@ class Favorite(models.Model):
         verbose_name='Пользователь',
     )
     recipe = models.ForeignKey(
-        'recipes.Recipe',
+        Recipe,
         on_delete=models.CASCADE,
         related_name='favorites',
         verbose_name='Рецепт',
     )
 
+    objects = FavoriteQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from feed.models import FeedItem
+
+admin.site.register(FeedItem)
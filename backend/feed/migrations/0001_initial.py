@@ -0,0 +1,101 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_feeds(apps, schema_editor):
+    FeedItem = apps.get_model('feed', 'FeedItem')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Subscription = apps.get_model('users', 'Subscription')
+    subscriptions = Subscription.objects.values_list(
+        'follower_id', 'following_id'
+    )
+    for follower_id, author_id in subscriptions.iterator():
+        FeedItem.objects.bulk_create(
+            (
+                FeedItem(
+                    user_id=follower_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                )
+                for recipe_id in Recipe.objects.filter(
+                    author_id=author_id
+                ).values_list('id', flat=True)
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ('recipes', '0005_recipe_search_index'),
+        ('users', '0002_customuser_avatar_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'author',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Автор',
+                    ),
+                ),
+                (
+                    'recipe',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='feed_items',
+                        to='recipes.recipe',
+                        verbose_name='Рецепт',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='feed',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Подписчик',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+                'ordering': ('-recipe',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(
+                fields=['user', 'author'], name='feed_item_user_author_idx'
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='feeditem',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_feed_item'
+            ),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
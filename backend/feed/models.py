@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.db import connections, models, router
+
+from recipes.models import Recipe
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class FeedItemQuerySet(models.QuerySet):
+    def insert_from(self, select, params):
+        """Добавляет в ленты строки, выбранные запросом ``select``.
+
+        ``select`` возвращает столбцы ``(user, recipe, author)`` и
+        ссылается на таблицы подписок и рецептов через подстановки
+        ``{subscription}``, ``{follower}``, ``{recipe_table}`` и т. д.
+        ``INSERT ... SELECT`` выполняется целиком в базе, а
+        ``ON CONFLICT DO NOTHING`` пропускает записи, уже попавшие в ленту.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        feed = self.model._meta
+        subscription = Subscription._meta
+        recipe = Recipe._meta
+        sql = (
+            'INSERT INTO {feed} ({user}, {recipe}, {author}) '
+            + select
+            + ' ON CONFLICT DO NOTHING'
+        ).format(
+            feed=quote(feed.db_table),
+            user=quote(feed.get_field('user').column),
+            recipe=quote(feed.get_field('recipe').column),
+            author=quote(feed.get_field('author').column),
+            follower=quote(subscription.get_field('follower').column),
+            following=quote(subscription.get_field('following').column),
+            subscription=quote(subscription.db_table),
+            recipe_table=quote(recipe.db_table),
+            recipe_pk=quote(recipe.pk.column),
+            recipe_author=quote(recipe.get_field('author').column),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def fan_out(self, recipe):
+        """Добавляет новый рецепт в ленты всех подписчиков автора.
+
+        Вызывается в транзакции создания рецепта. Запрос один и не
+        гоняет подписчиков через Python, но пишет по строке в ленту
+        каждого из них, поэтому время создания рецепта растёт с числом
+        подписчиков автора.
+        """
+        self.insert_from(
+            'SELECT {follower}, %s, %s FROM {subscription} '
+            'WHERE {following} = %s',
+            [recipe.id, recipe.author_id, recipe.author_id],
+        )
+
+    def backfill(self, follower, author_ids):
+        """Переносит рецепты авторов в ленту нового подписчика."""
+        author_ids = list(author_ids)
+        if not author_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(author_ids))
+        self.insert_from(
+            'SELECT %s, {recipe_pk}, {recipe_author} FROM {recipe_table} '
+            'WHERE {recipe_author} IN (' + placeholders + ')',
+            [follower.id, *author_ids],
+        )
+
+    def prune(self, follower, author_ids):
+        """Убирает рецепты авторов из ленты отписавшегося пользователя."""
+        self.filter(user=follower, author_id__in=author_ids).delete()
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+
+    objects = FeedItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_item'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'], name='feed_item_user_author_idx'
+            )
+        ]
+        ordering = ('-recipe',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
@@ -17,7 +17,7 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @staticmethod
     def favorite_count(obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
     favorite_count.short_description = 'В избранном'
 
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.images import store_variants
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Build thumbnail and WebP variants for images without them'
+    sources = ((Recipe, 'image'), (User, 'avatar'))
+
+    def handle(self, *args, **options):
+        built = 0
+        for model, field_name in self.sources:
+            pks = (
+                model.objects.exclude(**{field_name: ''})
+                .filter(
+                    Q(**{f'{field_name}_thumbnail__isnull': True})
+                    | Q(**{f'{field_name}_thumbnail': ''}),
+                    **{f'{field_name}__isnull': False},
+                )
+                .values_list('pk', flat=True)
+            )
+            for pk in pks.iterator():
+                store_variants(model, pk, field_name)
+                built += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Варианты изображений построены: {built}')
+        )
@@ -1,18 +1,83 @@
 import csv
+import hashlib
+import json
+from itertools import islice
+from pathlib import Path
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
-from recipes.models import Ingredient
+from api.versions import bump_version
+from recipes.models import DataImport, Ingredient
 
 
 class Command(BaseCommand):
-    help = 'Load ingredients from csv file'
+    help = 'Load ingredients from csv or json file'
     ingredients_file = 'recipes/management/commands/ingredients.csv'
     fields = ('name', 'measurement_unit')
+    source = 'ingredients'
+    batch_size = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=self.ingredients_file,
+            help='Path to a csv or json file with ingredients',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Load the file even if it has already been imported',
+        )
 
     def handle(self, *args, **options):
-        with open(self.ingredients_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, fieldnames=self.fields)
-            for row in reader:
-                Ingredient.objects.get_or_create(**row)
-        self.stdout.write(self.style.SUCCESS('Ингредиенты загружены'))
+        path = Path(options['file'])
+        checksum = self.get_checksum(path)
+        if (
+            not options['force']
+            and DataImport.objects.filter(
+                source=self.source, checksum=checksum
+            ).exists()
+        ):
+            self.stdout.write(
+                self.style.SUCCESS(
+                    'Ингредиенты не изменились, загрузка пропущена'
+                )
+            )
+            return
+
+        count_before = Ingredient.objects.count()
+        rows = self.read_rows(path)
+        with transaction.atomic():
+            while True:
+                batch = [
+                    Ingredient(**row) for row in islice(rows, self.batch_size)
+                ]
+                if not batch:
+                    break
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+            DataImport.objects.update_or_create(
+                source=self.source, defaults={'checksum': checksum}
+            )
+        bump_version('ingredients')
+        created = Ingredient.objects.count() - count_before
+        self.stdout.write(
+            self.style.SUCCESS(f'Ингредиенты загружены, новых: {created}')
+        )
+
+    @staticmethod
+    def get_checksum(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(65536), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def read_rows(self, path):
+        with open(path, 'r', encoding='utf-8') as file:
+            if path.suffix == '.json':
+                rows = json.load(file)
+            else:
+                rows = csv.DictReader(file, fieldnames=self.fields)
+            for row in rows:
+                yield {field: row[field] for field in self.fields}
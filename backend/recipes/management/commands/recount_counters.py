@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from favorites.models import Favorite
+from recipes.models import Recipe
+from shopping.models import ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_by(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('id'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized counters and report drift'
+    counters = (
+        (Recipe, 'favorites_count', Favorite, 'recipe'),
+        (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+        (User, 'recipes_count', Recipe, 'author'),
+        (User, 'followers_count', Subscription, 'following'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift without fixing it',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for model, counter, related_model, field in self.counters:
+                drifted = (
+                    model.objects.annotate(
+                        expected=count_by(related_model, field)
+                    )
+                    .exclude(**{counter: F('expected')})
+                    .count()
+                )
+                if drifted and not options['dry_run']:
+                    model.objects.update(
+                        **{counter: count_by(related_model, field)}
+                    )
+                message = (
+                    f'{model._meta.verbose_name_plural}.{counter}: '
+                    f'расхождений {drifted}'
+                )
+                if drifted:
+                    self.stdout.write(self.style.WARNING(message))
+                else:
+                    self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,356 @@
+import math
+from io import StringIO
+from itertools import islice
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+from django.db.models import Count, Max, Min
+
+from api.versions import bump_version
+from favorites.models import Favorite
+from feed.models import FeedItem
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from shopping.models import ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+TAGS = ('breakfast', 'lunch', 'dinner', 'dessert', 'vegan', 'quick')
+WORDS = (
+    'суп', 'салат', 'пирог', 'каша', 'запеканка', 'рагу', 'плов', 'омлет',
+    'сырники', 'блины', 'котлеты', 'паста', 'ризотто', 'борщ', 'щи',
+)
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Сергей', 'Елена')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Орлов')
+AMOUNTS = (1, 2, 3, 5, 10, 20, 50, 100, 150, 200, 250, 300, 500, 1000)
+
+
+def copy_value(value):
+    if value is None:
+        return ''
+    return '"{}"'.format(str(value).replace('"', '""'))
+
+
+class Zipf:
+    """Выбор позиций ``0..size-1`` с вероятностью ~ ``1 / rank ** s``.
+
+    Ранг считается по обратной функции непрерывного распределения,
+    поэтому выборка не требует таблиц размера ``size``. Ранги
+    переставляются биекцией ``rank * step + shift`` по модулю
+    ``size``, чтобы популярными оказались не только первые записи.
+    """
+
+    def __init__(self, size, exponent, random):
+        self.size = size
+        self.exponent = exponent
+        self.random = random
+        self.shift = random.randrange(size)
+        self.step = max(1, int(size * 0.618)) | 1
+        while math.gcd(self.step, size) != 1:
+            self.step += 2
+
+    def rank(self):
+        uniform = self.random.random()
+        if math.isclose(self.exponent, 1):
+            value = (self.size + 1) ** uniform
+        else:
+            power = 1 - self.exponent
+            value = (
+                1 + uniform * ((self.size + 1) ** power - 1)
+            ) ** (1 / power)
+        return min(int(value), self.size) - 1
+
+    def sample(self):
+        return (self.rank() * self.step + self.shift) % self.size
+
+    def sample_distinct(self, count, exclude=None):
+        chosen = set()
+        for _ in range(count * 20):
+            if len(chosen) >= count:
+                break
+            position = self.sample()
+            if position != exclude:
+                chosen.add(position)
+        return sorted(chosen)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset of users, recipes, '
+        'favorites, shopping carts and subscriptions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites',
+            type=float,
+            default=20,
+            help='Mean number of favorite recipes per user',
+        )
+        parser.add_argument(
+            '--shopping-cart',
+            type=float,
+            default=3,
+            help='Mean number of recipes in a shopping cart',
+        )
+        parser.add_argument(
+            '--subscriptions',
+            type=float,
+            default=10,
+            help='Mean number of followed authors per user',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Zipf exponent of author and recipe popularity',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--password',
+            help='Password of generated users, unusable by default',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or options['recipes'] < 1:
+            raise CommandError('Нужно хотя бы два пользователя и один рецепт')
+        self.options = options
+        self.random = Random(options['seed'])
+        self.prefix = f'seed{options["seed"]}_'
+        if User.objects.filter(username=f'{self.prefix}0').exists():
+            raise CommandError(
+                f'Данные с сидом {options["seed"]} уже созданы'
+            )
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients', stdout=StringIO())
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=slug.capitalize(), slug=slug) for slug in TAGS
+            )
+            bump_version('tags')
+        self.tag_ids = list(
+            Tag.objects.order_by('id').values_list('id', flat=True)
+        )
+        self.ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+
+        first_user = self.write_range(User, options['users'], self.users())
+        self.authors = Zipf(options['users'], options['zipf'], self.random)
+        first_recipe = self.write_range(
+            Recipe, options['recipes'], self.recipes(first_user)
+        )
+        self.popular = Zipf(options['recipes'], options['zipf'], self.random)
+        self.write(RecipeIngredient, self.recipe_ingredients(first_recipe))
+        self.write(Recipe.tags.through, self.recipe_tags(first_recipe))
+        for model, owner_field, target_field, mean, targets, first in (
+            (
+                Favorite,
+                'user_id',
+                'recipe_id',
+                options['favorites'],
+                self.popular,
+                first_recipe,
+            ),
+            (
+                ShoppingCart,
+                'user_id',
+                'recipe_id',
+                options['shopping_cart'],
+                self.popular,
+                first_recipe,
+            ),
+            (
+                Subscription,
+                'follower_id',
+                'following_id',
+                options['subscriptions'],
+                self.authors,
+                first_user,
+            ),
+        ):
+            self.write(
+                model,
+                self.relations(
+                    model,
+                    owner_field,
+                    target_field,
+                    mean,
+                    targets,
+                    first,
+                    first_user,
+                ),
+            )
+
+        call_command('recount_counters', stdout=StringIO())
+        call_command('rebuild_shopping_lists', stdout=StringIO())
+        self.fill_feeds(first_user)
+        for name in ('recipes', 'recipes_search'):
+            bump_version(name)
+        self.stdout.write(self.style.SUCCESS('Тестовые данные созданы'))
+
+    def users(self):
+        password = make_password(self.options['password'])
+        for number in range(self.options['users']):
+            yield User(
+                username=f'{self.prefix}{number}',
+                email=f'{self.prefix}{number}@example.com',
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=self.random.choice(LAST_NAMES),
+                password=password,
+            )
+
+    def recipes(self, first_user):
+        for number in range(self.options['recipes']):
+            yield Recipe(
+                name=' '.join(self.random.sample(WORDS, 2)).capitalize(),
+                text=' '.join(self.random.choices(WORDS, k=30)),
+                cooking_time=min(
+                    600, max(1, round(self.random.lognormvariate(3.4, 0.6)))
+                ),
+                author_id=first_user + self.authors.sample(),
+                # Файлы не создаются: для нагрузки важны только пути.
+                image=f'media/recipies/seed/{number % 100}.png',
+            )
+
+    def recipe_ingredients(self, first_recipe):
+        ingredients = Zipf(
+            len(self.ingredient_ids), self.options['zipf'], self.random
+        )
+        for offset in range(self.options['recipes']):
+            count = min(20, max(1, round(self.random.gauss(7, 2.5))))
+            for position in ingredients.sample_distinct(count):
+                yield RecipeIngredient(
+                    recipe_id=first_recipe + offset,
+                    ingredient_id=self.ingredient_ids[position],
+                    amount=self.random.choice(AMOUNTS),
+                )
+
+    def recipe_tags(self, first_recipe):
+        tags = Zipf(len(self.tag_ids), self.options['zipf'], self.random)
+        for offset in range(self.options['recipes']):
+            count = 1 + int(self.random.expovariate(1.2))
+            for position in tags.sample_distinct(count):
+                yield Recipe.tags.through(
+                    recipe_id=first_recipe + offset,
+                    tag_id=self.tag_ids[position],
+                )
+
+    def relations(
+        self,
+        model,
+        owner_field,
+        target_field,
+        mean,
+        targets,
+        first_target,
+        first_user,
+    ):
+        self_offset = model is Subscription
+        for offset in range(self.options['users']):
+            count = min(
+                targets.size - self_offset,
+                int(self.random.expovariate(1 / mean)) if mean else 0,
+            )
+            positions = targets.sample_distinct(
+                count, exclude=offset if self_offset else None
+            )
+            for position in positions:
+                yield model(
+                    **{
+                        owner_field: first_user + offset,
+                        target_field: first_target + position,
+                    }
+                )
+
+    @staticmethod
+    def fill_feeds(first_user):
+        """Заполняет ленты созданных подписчиков одним запросом.
+
+        ``FeedItem.objects.backfill`` для каждого подписчика гонял бы
+        через Python все рецепты популярных авторов, а
+        ``INSERT ... SELECT`` выполняется целиком в базе.
+        """
+        FeedItem.objects.insert_from(
+            'SELECT s.{follower}, r.{recipe_pk}, r.{recipe_author} '
+            'FROM {subscription} s JOIN {recipe_table} r '
+            'ON r.{recipe_author} = s.{following} '
+            'WHERE s.{follower} >= %s',
+            [first_user],
+        )
+
+    def write_range(self, model, expected, objs):
+        """Записывает объекты и возвращает первый из их идентификаторов.
+
+        Идентификаторы созданных записей должны идти подряд, тогда
+        связи можно строить по смещению без таблицы соответствия.
+        """
+        before = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        self.write(model, objs)
+        created = model.objects.filter(pk__gt=before).aggregate(
+            first=Min('pk'), last=Max('pk'), total=Count('pk')
+        )
+        if (
+            created['total'] != expected
+            or created['last'] - created['first'] + 1 != expected
+        ):
+            raise CommandError(
+                f'Идентификаторы {model._meta.verbose_name_plural} '
+                'идут не подряд: запустите команду без параллельной '
+                'записи в базу'
+            )
+        return created['first']
+
+    def write(self, model, objs):
+        connection = connections[router.db_for_write(model)]
+        objs = iter(objs)
+        total = 0
+        while True:
+            batch = list(islice(objs, self.options['batch_size']))
+            if not batch:
+                break
+            if connection.vendor == 'postgresql':
+                self.copy(connection, model, batch)
+            else:
+                model.objects.bulk_create(batch)
+            total += len(batch)
+        self.stdout.write(f'{model._meta.label}: создано {total}')
+
+    @staticmethod
+    def copy(connection, model, batch):
+        """Записывает пачку объектов через ``COPY ... FROM STDIN``."""
+        fields = [
+            field
+            for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        buffer = StringIO()
+        for obj in batch:
+            buffer.write(
+                ','.join(
+                    copy_value(
+                        field.get_db_prep_save(
+                            field.pre_save(obj, True), connection
+                        )
+                    )
+                    for field in fields
+                )
+            )
+            buffer.write('\n')
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+                f'({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
@@ -0,0 +1,111 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:23
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_rows(model, owner_field, keep_id, duplicate_ids):
+    """Переносит строки на оставшийся ингредиент, суммируя количество."""
+    for row in model.objects.filter(ingredient_id__in=duplicate_ids):
+        kept = model.objects.filter(
+            ingredient_id=keep_id,
+            **{owner_field: getattr(row, owner_field)},
+        ).first()
+        if kept is None:
+            row.ingredient_id = keep_id
+            row.save(update_fields=('ingredient',))
+        else:
+            kept.amount += row.amount
+            kept.save(update_fields=('amount',))
+            row.delete()
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingListItem = apps.get_model('shopping', 'ShoppingListItem')
+    duplicates = (
+        Ingredient.objects.values('name', 'measurement_unit')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for duplicate in duplicates:
+        duplicate_ids = list(
+            Ingredient.objects.filter(
+                name=duplicate['name'],
+                measurement_unit=duplicate['measurement_unit'],
+            )
+            .exclude(id=duplicate['keep_id'])
+            .values_list('id', flat=True)
+        )
+        merge_rows(
+            RecipeIngredient, 'recipe_id', duplicate['keep_id'], duplicate_ids
+        )
+        merge_rows(
+            ShoppingListItem, 'user_id', duplicate['keep_id'], duplicate_ids
+        )
+        Ingredient.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+    # В PostgreSQL внешние ключи проверяются отложенно: после переноса
+    # строк в той же транзакции ALTER TABLE падает с "pending trigger
+    # events". Слияние выполняется в своей транзакции до ограничения.
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+        ('shopping', '0003_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataImport',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'source',
+                    models.CharField(
+                        max_length=100, unique=True, verbose_name='Источник'
+                    ),
+                ),
+                (
+                    'checksum',
+                    models.CharField(
+                        max_length=64, verbose_name='Контрольная сумма'
+                    ),
+                ),
+                (
+                    'imported_at',
+                    models.DateTimeField(
+                        auto_now=True, verbose_name='Дата загрузки'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Загрузка данных',
+                'verbose_name_plural': 'Загрузки данных',
+                'ordering': ('source',),
+            },
+        ),
+        migrations.RunPython(
+            merge_duplicate_ingredients,
+            migrations.RunPython.noop,
+            atomic=True,
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(
+                fields=('name', 'measurement_unit'), name='unique_ingredient'
+            ),
+        ),
+    ]
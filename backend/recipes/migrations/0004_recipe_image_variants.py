@@ -0,0 +1,34 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0003_unique_ingredient_dataimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_thumbnail',
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to='media/recipies/variants/',
+                verbose_name='Миниатюра изображения',
+            ),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_webp',
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to='media/recipies/variants/',
+                verbose_name='Изображение в WebP',
+            ),
+        ),
+    ]
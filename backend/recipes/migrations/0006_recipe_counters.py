@@ -0,0 +1,54 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_by(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('id'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('favorites', 'Favorite')
+    ShoppingCart = apps.get_model('shopping', 'ShoppingCart')
+    Recipe.objects.update(
+        favorites_count=count_by(Favorite, 'recipe'),
+        in_carts_count=count_by(ShoppingCart, 'recipe'),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0005_recipe_search_index'),
+        ('favorites', '0003_initial'),
+        ('shopping', '0003_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='В избранном'
+            ),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='В списках покупок'
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
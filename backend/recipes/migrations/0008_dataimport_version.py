@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0007_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataimport',
+            name='version',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Версия данных'
+            ),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -25,6 +28,11 @@ class Ingredient(models.Model):
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'], name='unique_ingredient'
+            )
+        ]
         ordering = ('name',)
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
@@ -33,6 +41,49 @@ class Ingredient(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    def touch(self):
+        """Отмечает рецепты изменёнными без вызова ``save``."""
+        return self.update(updated_at=timezone.now())
+
+    def first_per_author(self, author_ids, limit=None):
+        """Последние рецепты каждого автора одним запросом.
+
+        Нумерует рецепты внутри автора оконной функцией ROW_NUMBER
+        и отбрасывает всё, что не попадает в первые ``limit`` строк.
+        """
+        if not author_ids:
+            # Пустой ``IN`` не компилируется в SQL для ``raw``.
+            return []
+        recipes = self.filter(author__in=author_ids).only(
+            'id',
+            'name',
+            'image',
+            'image_thumbnail',
+            'image_webp',
+            'cooking_time',
+            'author',
+        )
+        if limit is None:
+            return list(recipes)
+        ranked = recipes.annotate(
+            recipe_rank=Window(
+                expression=RowNumber(),
+                partition_by=F('author_id'),
+                order_by=F('id').desc(),
+            )
+        )
+        sql, params = ranked.query.sql_with_params()
+        return list(
+            self.raw(
+                f'SELECT * FROM ({sql}) ranked '
+                'WHERE ranked.recipe_rank <= %s '
+                'ORDER BY ranked.id DESC',
+                (*params, limit),
+            )
+        )
+
+
 class Recipe(models.Model):
     name = models.CharField(max_length=256, verbose_name='Название')
     text = models.TextField(verbose_name='Описание')
@@ -54,6 +105,20 @@ class Recipe(models.Model):
         null=True,
         verbose_name='Изображение',
     )
+    image_thumbnail = models.ImageField(
+        upload_to='media/recipies/variants/',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Миниатюра изображения',
+    )
+    image_webp = models.ImageField(
+        upload_to='media/recipies/variants/',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Изображение в WebP',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -61,11 +126,48 @@ class Recipe(models.Model):
         verbose_name='Автор',
     )
 
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='В списках покупок'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Дата изменения'
+    )
+
+    objects = RecipeQuerySet.as_manager()
+
+    COUNTER_FIELDS = ('favorites_count', 'in_carts_count')
+
     class Meta:
         ordering = ('-id',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        """Сохраняет рецепт, не трогая счётчики.
+
+        Счётчики меняются запросами ``UPDATE`` с ``F()`` в обход
+        экземпляра, и к моменту полного сохранения значения в нём могут
+        устареть. Поэтому полное сохранение существующего рецепта
+        обновляет все поля, кроме счётчиков.
+        """
+        if update_fields is None and not (self._state.adding or force_insert):
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
@@ -87,3 +189,26 @@ class RecipeIngredient(models.Model):
         ]
         verbose_name = 'Ингредиент рецепта'
         verbose_name_plural = 'Ингредиенты рецепта'
+
+
+class DataImport(models.Model):
+    source = models.CharField(
+        max_length=100, unique=True, verbose_name='Источник'
+    )
+    checksum = models.CharField(
+        max_length=64, verbose_name='Контрольная сумма'
+    )
+    imported_at = models.DateTimeField(
+        auto_now=True, verbose_name='Дата загрузки'
+    )
+    version = models.PositiveIntegerField(
+        default=0, verbose_name='Версия данных'
+    )
+
+    class Meta:
+        ordering = ('source',)
+        verbose_name = 'Загрузка данных'
+        verbose_name_plural = 'Загрузки данных'
+
+    def __str__(self):
+        return self.source
@@ -1,5 +1,11 @@
 from django.contrib import admin
 
-from shopping.models import ShoppingCart
+from shopping.models import ShoppingCart, ShoppingListItem
 
 admin.site.register(ShoppingCart)
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'amount')
+    search_fields = ('user__email', 'ingredient__name')
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from recipes.models import RecipeIngredient
+from shopping.models import ShoppingListItem
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild shopping lists from shopping carts and report drift'
+    batch_size = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift without fixing it',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = (
+            User.objects.filter(
+                Q(shopping_cart__isnull=False) | Q(shopping_list__isnull=False)
+            )
+            .distinct()
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        drift = {'missing': 0, 'wrong': 0, 'extra': 0}
+        batch = []
+        for user_id in user_ids.iterator():
+            batch.append(user_id)
+            if len(batch) == self.batch_size:
+                self.reconcile(batch, drift, options['dry_run'])
+                batch = []
+        if batch:
+            self.reconcile(batch, drift, options['dry_run'])
+
+        report = (
+            f'Отсутствовало позиций: {drift["missing"]}, '
+            f'с неверным количеством: {drift["wrong"]}, '
+            f'лишних: {drift["extra"]}'
+        )
+        if any(drift.values()):
+            self.stdout.write(self.style.WARNING(report))
+        else:
+            self.stdout.write(self.style.SUCCESS(report))
+
+    @staticmethod
+    def reconcile(user_ids, drift, dry_run):
+        expected = {
+            (row['recipe__shopping_cart__user'], row['ingredient']): row[
+                'total_amount'
+            ]
+            for row in RecipeIngredient.objects.filter(
+                recipe__shopping_cart__user__in=user_ids
+            )
+            .values('recipe__shopping_cart__user', 'ingredient')
+            .annotate(total_amount=Sum('amount'))
+            .order_by()
+        }
+        to_update = []
+        to_delete = []
+        for item in ShoppingListItem.objects.filter(user_id__in=user_ids):
+            amount = expected.pop((item.user_id, item.ingredient_id), None)
+            if amount is None:
+                to_delete.append(item.id)
+            elif amount != item.amount:
+                item.amount = amount
+                to_update.append(item)
+        to_create = [
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            )
+            for (user_id, ingredient_id), amount in expected.items()
+        ]
+        drift['missing'] += len(to_create)
+        drift['wrong'] += len(to_update)
+        drift['extra'] += len(to_delete)
+        if dry_run:
+            return
+        with transaction.atomic():
+            ShoppingListItem.objects.filter(id__in=to_delete).delete()
+            ShoppingListItem.objects.bulk_update(to_update, ('amount',))
+            ShoppingListItem.objects.bulk_create(to_create)
@@ -1,11 +1,26 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Sum, Value, When
 
-from recipes.models import Recipe
+from recipes.models import Ingredient, Recipe, RecipeIngredient
 
 User = get_user_model()
 
 
+class ShoppingCartQuerySet(models.QuerySet):
+    def added(self, user, recipe_ids):
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            in_carts_count=F('in_carts_count') + 1
+        )
+        ShoppingListItem.objects.add_recipes(user, recipe_ids)
+
+    def removed(self, user, recipe_ids):
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            in_carts_count=F('in_carts_count') - 1
+        )
+        ShoppingListItem.objects.remove_recipes(user, recipe_ids)
+
+
 class ShoppingCart(models.Model):
     user = models.ForeignKey(
         User,
@@ -20,6 +35,8 @@ class ShoppingCart(models.Model):
         verbose_name='Рецепт',
     )
 
+    objects = ShoppingCartQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -28,3 +45,112 @@ class ShoppingCart(models.Model):
         ]
         ordering = ('id',)
         verbose_name = 'Корзина'
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    @staticmethod
+    def recipe_amounts(recipe, sign=1):
+        return {
+            ingredient_id: sign * amount
+            for ingredient_id, amount in RecipeIngredient.objects.filter(
+                recipe=recipe
+            ).values_list('ingredient_id', 'amount')
+        }
+
+    def apply_deltas(self, user_ids, deltas):
+        """Прибавляет ``deltas`` к спискам покупок пользователей.
+
+        ``deltas`` сопоставляет ID ингредиента с изменением количества.
+        Существующие позиции обновляются одним UPDATE, недостающие
+        создаются, а позиции с нулевым остатком удаляются.
+        """
+        deltas = {key: value for key, value in deltas.items() if value}
+        if not deltas:
+            return
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        with transaction.atomic():
+            list(
+                User.objects.select_for_update()
+                .filter(id__in=user_ids)
+                .values_list('id', flat=True)
+            )
+            items = self.filter(user_id__in=user_ids, ingredient_id__in=deltas)
+            items.update(
+                amount=F('amount')
+                + Case(
+                    *(
+                        When(ingredient_id=ingredient_id, then=Value(delta))
+                        for ingredient_id, delta in deltas.items()
+                    ),
+                    default=Value(0),
+                )
+            )
+            existing = set(items.values_list('user_id', 'ingredient_id'))
+            self.bulk_create(
+                self.model(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=delta
+                )
+                for user_id in user_ids
+                for ingredient_id, delta in deltas.items()
+                if delta > 0 and (user_id, ingredient_id) not in existing
+            )
+            self.filter(user_id__in=user_ids, amount__lte=0).delete()
+
+    @staticmethod
+    def recipes_amounts(recipe_ids, sign=1):
+        return {
+            row['ingredient_id']: sign * row['total_amount']
+            for row in RecipeIngredient.objects.filter(
+                recipe_id__in=recipe_ids
+            )
+            .values('ingredient_id')
+            .annotate(total_amount=Sum('amount'))
+            .order_by()
+        }
+
+    def add_recipes(self, user, recipe_ids):
+        self.apply_deltas((user.id,), self.recipes_amounts(recipe_ids))
+
+    def remove_recipes(self, user, recipe_ids):
+        self.apply_deltas(
+            (user.id,), self.recipes_amounts(recipe_ids, sign=-1)
+        )
+
+    def propagate_recipe_change(self, recipe, deltas):
+        """Переносит изменение ингредиентов рецепта в списки покупок."""
+        self.apply_deltas(
+            ShoppingCart.objects.filter(recipe=recipe).values_list(
+                'user_id', flat=True
+            ),
+            deltas,
+        )
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+    )
+    amount = models.IntegerField(verbose_name='Количество')
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'], name='unique_shopping_list_item'
+            )
+        ]
+        ordering = ('id',)
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Список покупок'
@@ -8,7 +8,7 @@ User = get_user_model()
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('email', 'username')
+    list_display = ('email', 'username', 'recipes_count', 'followers_count')
     search_fields = ('email', 'username')
     readonly_fields = ('date_joined', 'last_login')
 
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='avatar_thumbnail',
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to='media/users/variants/',
+                verbose_name='Миниатюра аватара',
+            ),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='avatar_webp',
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                null=True,
+                upload_to='media/users/variants/',
+                verbose_name='Аватар в WebP',
+            ),
+        ),
+    ]
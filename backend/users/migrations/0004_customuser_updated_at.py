@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0003_customuser_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='updated_at',
+            field=models.DateTimeField(
+                auto_now=True, verbose_name='Дата изменения'
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
 
 
 class CustomUser(AbstractUser):
@@ -19,6 +20,29 @@ class CustomUser(AbstractUser):
     avatar = models.ImageField(
         upload_to='media/users/', blank=True, null=True, verbose_name='Аватар'
     )
+    avatar_thumbnail = models.ImageField(
+        upload_to='media/users/variants/',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Миниатюра аватара',
+    )
+    avatar_webp = models.ImageField(
+        upload_to='media/users/variants/',
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Аватар в WebP',
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Подписчиков'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Дата изменения'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
@@ -32,6 +56,18 @@ class CustomUser(AbstractUser):
         return self.email
 
 
+class SubscriptionQuerySet(models.QuerySet):
+    def added(self, follower, author_ids):
+        CustomUser.objects.filter(id__in=author_ids).update(
+            followers_count=F('followers_count') + 1
+        )
+
+    def removed(self, follower, author_ids):
+        CustomUser.objects.filter(id__in=author_ids).update(
+            followers_count=F('followers_count') - 1
+        )
+
+
 class Subscription(models.Model):
     follower = models.ForeignKey(
         CustomUser,
@@ -46,6 +82,8 @@ class Subscription(models.Model):
         verbose_name='Автор',
     )
 
+    objects = SubscriptionQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(